@@ -17,26 +17,80 @@ Usage:
 import asyncio
 import argparse
 import aiohttp
+import itertools
 import json
 import time
 import random
 import string
 import sys
+from array import array
+from collections import defaultdict, deque
+from contextlib import contextmanager
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass, field
-from statistics import mean, median, stdev
-import subprocess
-import threading
-import queue
 
+try:
+    import orjson
+    dumps = orjson.dumps
+    loads = orjson.loads
+except ImportError:  # optional, falls back to the stdlib codec
+    orjson = None
+    loads = json.loads
+    def dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
 
-@dataclass
+try:
+    import uvloop  # optional, libuv event loop (no windows support)
+except ImportError:
+    uvloop = None
+
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# maps every byte value onto a letter so random bytes become filler text
+LETTER_TABLE = bytes(ord(string.ascii_letters[b % len(string.ascii_letters)]) for b in range(256))
+
+
+async def gather_bounded(limit: int, coros):
+    """gather coroutines with at most `limit` of them running at once"""
+    semaphore = asyncio.Semaphore(limit)
+    
+    async def run(coro):
+        async with semaphore:
+            return await coro
+    
+    return await asyncio.gather(*[run(c) for c in coros])
+
+
+async def run_bounded(limit: int, coros):
+    """run coroutines pulled lazily from `coros` with at most `limit` tasks alive
+    
+    unlike gather_bounded, nothing is created for an item until a slot frees up,
+    so memory stays flat however many iterations are requested
+    """
+    semaphore = asyncio.Semaphore(limit)
+    
+    async def run(coro):
+        try:
+            await coro
+        except Exception:
+            pass  # failures are already recorded as metrics
+        finally:
+            semaphore.release()
+    
+    async with asyncio.TaskGroup() as tg:
+        for coro in coros:
+            await semaphore.acquire()
+            tg.create_task(run(coro))
+
+
+@dataclass(slots=True)
 class TestMetrics:
     """Track metrics for test operations"""
     operation: str
-    start_time: float
-    end_time: Optional[float] = None
+    start_time: int  # time.perf_counter_ns()
+    end_time: Optional[int] = None
     success: bool = False
     error: Optional[str] = None
     
@@ -44,40 +98,107 @@ class TestMetrics:
     def duration_ms(self) -> float:
         if self.end_time is None:
             return 0.0
-        return (self.end_time - self.start_time) * 1000
+        return (self.end_time - self.start_time) / 1_000_000
+
+
+def mean_stddev(values) -> Tuple[float, float]:
+    """single-pass (welford) mean and sample standard deviation"""
+    avg = m2 = 0.0
+    for k, x in enumerate(values, 1):
+        delta = x - avg
+        avg += delta / k
+        m2 += delta * (x - avg)
+    n = len(values)
+    return avg, (m2 / (n - 1)) ** 0.5 if n > 1 else 0.0
+
+
+def percentile(ordered, pct: float) -> float:
+    """linear-interpolated percentile of an already sorted sequence"""
+    rank = (len(ordered) - 1) * pct / 100
+    lo = int(rank)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (rank - lo)
+
+
+@dataclass
+class OpMetrics:
+    """Column storage for every sample of one operation type"""
+    durations: array = field(default_factory=lambda: array('d'))
+    success: array = field(default_factory=lambda: array('b'))
 
 
 @dataclass
 class TestSession:
     """Track a complete test session"""
-    metrics: List[TestMetrics] = field(default_factory=list)
+    metrics_by_op: Dict[str, OpMetrics] = field(default_factory=lambda: defaultdict(OpMetrics))
     users_created: List[Dict] = field(default_factory=list)
     servers_created: List[str] = field(default_factory=list)
     messages_sent: int = 0
-    errors: List[str] = field(default_factory=list)
+    # most recent failure messages only; per-operation error counts come from the columns
+    errors: deque = field(default_factory=lambda: deque(maxlen=10))
+    # operation -> (sample count, stats) so print_results reuses each phase's reduction
+    _stats_cache: Dict[str, Tuple[int, Dict]] = field(default_factory=dict, repr=False)
     
     def add_metric(self, metric: TestMetrics):
-        self.metrics.append(metric)
+        if metric.end_time is None:
+            return
+        self.record(metric.operation, metric.start_time, metric.end_time, metric.success, metric.error)
+    
+    def record(self, operation: str, start_ns: int, end_ns: int, success: bool, error: Optional[str] = None):
+        """append one sample without building a TestMetrics"""
+        op = self.metrics_by_op[operation]
+        op.durations.append((end_ns - start_ns) / 1_000_000)
+        op.success.append(success)
+        if error:
+            self.errors.append(f"{operation}: {error}")
     
     def get_stats(self, operation_type: str) -> Dict:
         """Get statistics for a specific operation type"""
-        relevant = [m for m in self.metrics if m.operation == operation_type and m.end_time is not None]
-        if not relevant:
-            return {"count": 0, "avg_ms": 0, "median_ms": 0, "min_ms": 0, "max_ms": 0, "success_rate": 0}
-        
-        durations = [m.duration_ms for m in relevant]
-        successful = [m for m in relevant if m.success]
-        
-        return {
-            "count": len(relevant),
-            "avg_ms": mean(durations),
-            "median_ms": median(durations),
-            "min_ms": min(durations),
-            "max_ms": max(durations),
-            "stddev_ms": stdev(durations) if len(durations) > 1 else 0,
-            "success_rate": len(successful) / len(relevant) * 100,
-            "total_errors": len(relevant) - len(successful)
+        op = self.metrics_by_op.get(operation_type)
+        if op is None or not op.durations:
+            return {"count": 0, "avg_ms": 0, "median_ms": 0, "p95_ms": 0, "p99_ms": 0,
+                    "min_ms": 0, "max_ms": 0, "rate_per_sec": 0, "success_rate": 0}
+        
+        durations = op.durations
+        count = len(durations)
+        cached = self._stats_cache.get(operation_type)
+        if cached is not None and cached[0] == count:
+            return cached[1]
+        successful = sum(op.success)
+        # one sort yields min/max and every percentile, one pass mean/stddev
+        ordered = sorted(durations)
+        avg_ms, stddev_ms = mean_stddev(durations)
+        total_ms = avg_ms * count
+        
+        stats = {
+            "count": count,
+            "avg_ms": avg_ms,
+            "median_ms": percentile(ordered, 50),
+            "p95_ms": percentile(ordered, 95),
+            "p99_ms": percentile(ordered, 99),
+            "min_ms": ordered[0],
+            "max_ms": ordered[-1],
+            "stddev_ms": stddev_ms,
+            # ops per second of cumulative request time (per in-flight request)
+            "rate_per_sec": count / (total_ms / 1000) if total_ms else 0,
+            "success_rate": successful / count * 100,
+            "total_errors": count - successful
         }
+        self._stats_cache[operation_type] = (count, stats)
+        return stats
+
+
+@contextmanager
+def timed(session: TestSession, operation: str):
+    """time the wrapped block and record it as one metric, exceptions included"""
+    metric = TestMetrics(operation=operation, start_time=time.perf_counter_ns())
+    try:
+        yield metric
+    except Exception as e:
+        metric.error = str(e)
+    finally:
+        metric.end_time = time.perf_counter_ns()
+        session.add_metric(metric)
 
 
 class AgoraClient:
@@ -90,10 +211,38 @@ class AgoraClient:
         self.access_token: Optional[str] = None
         self.user_id: Optional[str] = None
         self.device_id: Optional[str] = None
-        
+
+        # endpoint urls are fixed per client, build them once
+        self._url_register = f"{self.api_url}/register"
+        self._url_login = f"{self.api_url}/login"
+        self._url_create = f"{self.api_url}/rooms/create"
+        self._url_join = f"{self.api_url}/rooms/join"
+        self._url_leave = f"{self.api_url}/rooms/leave"
+        self._url_send = f"{self.api_url}/rooms/send"
+        self._url_members = f"{self.api_url}/rooms/members"
+        self._url_sync = f"{self.api_url}/sync"
+
+        # the api reads the token from the body/query, so it is encoded
+        # once per session instead of on every request
+        self._auth_params: Dict[str, str] = {}
+        self._auth_prefix = b""
+        
+    def _store_session(self, data: dict):
+        """remember the credentials returned by register/login"""
+        self.access_token = data.get("access_token")
+        self.user_id = data.get("user_id")
+        self.device_id = data.get("device_id")
+        self._auth_params = {"access_token": self.access_token}
+        # '{"access_token":"..."}' -> '{"access_token":"...",' so request
+        # fields can be appended without re-encoding the token
+        self._auth_prefix = dumps(self._auth_params)[:-1] + b","
+    
+    def _auth_body(self, payload: dict) -> bytes:
+        """encode an authenticated request body"""
+        return self._auth_prefix + dumps(payload)[1:]
+    
     async def register(self, username: str, password: str) -> Tuple[bool, Optional[str]]:
         """Register a new user"""
-        url = f"{self.api_url}/register"
         payload = {
             "username": username,
             "password": password,
@@ -101,12 +250,9 @@ class AgoraClient:
         }
         
         try:
-            async with self.session.post(url, json=payload) as resp:
+            async with self.session.post(self._url_register, data=dumps(payload), headers=JSON_HEADERS) as resp:
                 if resp.status == 200:
-                    data = await resp.json()
-                    self.access_token = data.get("access_token")
-                    self.user_id = data.get("user_id")
-                    self.device_id = data.get("device_id")
+                    self._store_session(await resp.json(loads=loads))
                     return True, None
                 else:
                     text = await resp.text()
@@ -116,7 +262,6 @@ class AgoraClient:
     
     async def login(self, username: str, password: str) -> Tuple[bool, Optional[str]]:
         """Login existing user"""
-        url = f"{self.api_url}/login"
         payload = {
             "username": username,
             "password": password,
@@ -124,12 +269,9 @@ class AgoraClient:
         }
         
         try:
-            async with self.session.post(url, json=payload) as resp:
+            async with self.session.post(self._url_login, data=dumps(payload), headers=JSON_HEADERS) as resp:
                 if resp.status == 200:
-                    data = await resp.json()
-                    self.access_token = data.get("access_token")
-                    self.user_id = data.get("user_id")
-                    self.device_id = data.get("device_id")
+                    self._store_session(await resp.json(loads=loads))
                     return True, None
                 else:
                     text = await resp.text()
@@ -142,17 +284,15 @@ class AgoraClient:
         if not self.access_token:
             return None, "Not authenticated"
             
-        url = f"{self.api_url}/rooms/create"
         payload = {
-            "access_token": self.access_token,
             "name": name,
             "is_space": True
         }
         
         try:
-            async with self.session.post(url, json=payload) as resp:
+            async with self.session.post(self._url_create, data=self._auth_body(payload), headers=JSON_HEADERS) as resp:
                 if resp.status == 200:
-                    data = await resp.json()
+                    data = await resp.json(loads=loads)
                     return data.get("room_id"), None
                 else:
                     text = await resp.text()
@@ -160,19 +300,36 @@ class AgoraClient:
         except Exception as e:
             return None, str(e)
     
+    async def join_server(self, room_id: str) -> Tuple[bool, Optional[str]]:
+        """Join a server"""
+        if not self.access_token:
+            return False, "Not authenticated"
+            
+        payload = {
+            "room_id_or_alias": room_id
+        }
+        
+        try:
+            async with self.session.post(self._url_join, data=self._auth_body(payload), headers=JSON_HEADERS) as resp:
+                if resp.status == 200:
+                    return True, None
+                else:
+                    text = await resp.text()
+                    return False, f"HTTP {resp.status}: {text}"
+        except Exception as e:
+            return False, str(e)
+    
     async def leave_server(self, room_id: str) -> Tuple[bool, Optional[str]]:
         """Leave a server"""
         if not self.access_token:
             return False, "Not authenticated"
             
-        url = f"{self.api_url}/rooms/leave"
         payload = {
-            "access_token": self.access_token,
             "room_id": room_id
         }
         
         try:
-            async with self.session.post(url, json=payload) as resp:
+            async with self.session.post(self._url_leave, data=self._auth_body(payload), headers=JSON_HEADERS) as resp:
                 if resp.status == 200:
                     return True, None
                 else:
@@ -186,9 +343,7 @@ class AgoraClient:
         if not self.access_token:
             return None, "Not authenticated"
             
-        url = f"{self.api_url}/rooms/create"
         payload = {
-            "access_token": self.access_token,
             "name": name,
             "is_space": False,
             "parent_space_id": server_id,
@@ -196,9 +351,9 @@ class AgoraClient:
         }
         
         try:
-            async with self.session.post(url, json=payload) as resp:
+            async with self.session.post(self._url_create, data=self._auth_body(payload), headers=JSON_HEADERS) as resp:
                 if resp.status == 200:
-                    data = await resp.json()
+                    data = await resp.json(loads=loads)
                     return data.get("room_id"), None
                 else:
                     text = await resp.text()
@@ -211,15 +366,13 @@ class AgoraClient:
         if not self.access_token:
             return False, "Not authenticated"
             
-        url = f"{self.api_url}/rooms/send"
         payload = {
-            "access_token": self.access_token,
             "room_id": room_id,
             "content": content
         }
         
         try:
-            async with self.session.post(url, json=payload) as resp:
+            async with self.session.post(self._url_send, data=self._auth_body(payload), headers=JSON_HEADERS) as resp:
                 if resp.status == 200:
                     return True, None
                 else:
@@ -233,13 +386,12 @@ class AgoraClient:
         if not self.access_token:
             return None, "Not authenticated"
             
-        url = f"{self.api_url}/rooms/members"
-        params = {"access_token": self.access_token, "room_id": room_id}
+        params = {**self._auth_params, "room_id": room_id}
         
         try:
-            async with self.session.get(url, params=params) as resp:
+            async with self.session.get(self._url_members, params=params) as resp:
                 if resp.status == 200:
-                    data = await resp.json()
+                    data = await resp.json(loads=loads)
                     return data.get("members", []), None
                 else:
                     text = await resp.text()
@@ -252,15 +404,12 @@ class AgoraClient:
         if not self.access_token:
             return None, "Not authenticated"
             
-        url = f"{self.api_url}/sync"
-        params = {"access_token": self.access_token}
-        if since:
-            params["since"] = since
+        params = {**self._auth_params, "since": since} if since else self._auth_params
             
         try:
-            async with self.session.get(url, params=params) as resp:
+            async with self.session.get(self._url_sync, params=params) as resp:
                 if resp.status == 200:
-                    return await resp.json(), None
+                    return await resp.json(loads=loads), None
                 else:
                     text = await resp.text()
                     return None, f"HTTP {resp.status}: {text}"
@@ -287,7 +436,24 @@ class LoadTester:
         print(f"config: {json.dumps(config, indent=2)}")
         print("="*70 + "\n")
         
-        async with aiohttp.ClientSession() as http_session:
+        # one tuned pool shared by every client; the default 100-connection
+        # cap and per-request dns lookups throttle the spam/mixed tests.
+        # everything goes to one host, so the per-host cap matches the pool
+        # (0 disables both)
+        pool_size = config.get('connector_limit')
+        if pool_size is None:
+            pool_size = max(256, config.get('concurrent_load_users', 10) * 8)
+        connector = aiohttp.TCPConnector(
+            limit=pool_size,
+            limit_per_host=pool_size,
+            ttl_dns_cache=300,
+            keepalive_timeout=60
+        )
+        timeout = aiohttp.ClientTimeout(total=30, connect=5)
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as http_session:
+            await self.warm_pool(http_session, config.get('concurrent_load_users', 10))
+
             # test 1: user registration stress test
             if config.get('test_registration', True):
                 await self.test_registration_spam(
@@ -327,45 +493,44 @@ class LoadTester:
                     duration_seconds=config.get('load_test_duration', 60),
                     concurrent_users=config.get('concurrent_load_users', 10)
                 )
-        
-        # print results
-        self.print_results()
-    
+
+    async def warm_pool(self, http_session: aiohttp.ClientSession, size: int):
+        """open keep-alive connections up front so the first test doesn't pay for handshakes"""
+        async def ping():
+            try:
+                async with http_session.head(f"{self.api_url}/health") as resp:
+                    await resp.read()
+            except Exception:
+                pass  # warmup is best-effort
+
+        await asyncio.gather(*[ping() for _ in range(size)])
+
     async def test_registration_spam(self, http_session: aiohttp.ClientSession, count: int, concurrent: int):
         """spam user registrations"""
         print(f"\ntest 1: registration spam ({count} users, {concurrent} concurrent)...")
         
-        semaphore = asyncio.Semaphore(concurrent)
+        # resolved once rather than inside every task
+        base_ts = int(time.time())
+        randrange = random.Random().randrange
+        session = self.session
         
         async def register_one(index: int):
-            async with semaphore:
-                username = f"loadtest_{int(time.time())}_{index}_{random.randint(1000, 9999)}"
-                password = "testpassword123"
-                
-                metric = TestMetrics(operation="registration", start_time=time.time())
-                client = AgoraClient(self.api_url, self.homeserver_url, http_session)
-                
-                try:
-                    success, error = await client.register(username, password)
-                    metric.success = success
-                    if error:
-                        metric.error = error
-                    
-                    if success:
-                        self.session.users_created.append({
-                            "username": username,
-                            "user_id": client.user_id,
-                            "access_token": client.access_token
-                        })
-                        self.clients.append(client)
-                except Exception as e:
-                    metric.error = str(e)
-                finally:
-                    metric.end_time = time.time()
-                    self.session.add_metric(metric)
-        
-        tasks = [register_one(i) for i in range(count)]
-        await asyncio.gather(*tasks, return_exceptions=True)
+            username = f"loadtest_{base_ts}_{index}_{randrange(1000, 9999)}"
+            password = "testpassword123"
+            client = AgoraClient(self.api_url, self.homeserver_url, http_session)
+            
+            with timed(session, "registration") as metric:
+                metric.success, metric.error = await client.register(username, password)
+            
+            if metric.success:
+                session.users_created.append({
+                    "username": username,
+                    "user_id": client.user_id,
+                    "access_token": client.access_token
+                })
+                self.clients.append(client)
+        
+        await run_bounded(concurrent, (register_one(i) for i in range(count)))
         
         stats = self.session.get_stats("registration")
         print(f"   completed: {stats['count']} registrations")
@@ -386,28 +551,19 @@ class LoadTester:
             print("   failed to create test user")
             return
         
-        semaphore = asyncio.Semaphore(concurrent)
+        randrange = random.Random().randrange
+        session = self.session
         
         async def create_one(index: int):
-            async with semaphore:
-                server_name = f"SpamServer_{index}_{random.randint(1000, 9999)}"
-                metric = TestMetrics(operation="server_creation", start_time=time.time())
-                
-                try:
-                    room_id, error = await client.create_server(server_name)
-                    metric.success = room_id is not None
-                    if error:
-                        metric.error = error
-                    if room_id:
-                        self.session.servers_created.append(room_id)
-                except Exception as e:
-                    metric.error = str(e)
-                finally:
-                    metric.end_time = time.time()
-                    self.session.add_metric(metric)
-        
-        tasks = [create_one(i) for i in range(count)]
-        await asyncio.gather(*tasks, return_exceptions=True)
+            server_name = f"SpamServer_{index}_{randrange(1000, 9999)}"
+            
+            with timed(session, "server_creation") as metric:
+                room_id, metric.error = await client.create_server(server_name)
+                metric.success = room_id is not None
+                if room_id:
+                    session.servers_created.append(room_id)
+        
+        await run_bounded(concurrent, (create_one(i) for i in range(count)))
         
         stats = self.session.get_stats("server_creation")
         print(f"   created: {stats['count']} servers")
@@ -422,63 +578,49 @@ class LoadTester:
             # create some servers to join/leave
             client = AgoraClient(self.api_url, self.homeserver_url, http_session)
             await client.register(f"jl_test_{int(time.time())}", "testpass123")
-            for i in range(5):
-                room_id, _ = await client.create_server(f"JLTarget_{i}")
-                if room_id:
-                    self.session.servers_created.append(room_id)
+            created = await gather_bounded(concurrent, [
+                client.create_server(f"JLTarget_{i}") for i in range(5)
+            ])
+            self.session.servers_created.extend(room_id for room_id, _ in created if room_id)
         
         # create users for join/leave
-        users = []
-        for i in range(min(concurrent * 2, 20)):
+        async def make_user(i: int) -> Optional[AgoraClient]:
             client = AgoraClient(self.api_url, self.homeserver_url, http_session)
             success, _ = await client.register(f"jl_user_{i}_{int(time.time())}", "testpass123")
-            if success:
-                users.append(client)
+            return client if success else None
         
-        semaphore = asyncio.Semaphore(concurrent)
+        users = [u for u in await gather_bounded(concurrent, [
+            make_user(i) for i in range(min(concurrent * 2, 20))
+        ]) if u]
         
-        async def join_leave_once(user_index: int, iteration: int):
-            async with semaphore:
-                user = users[user_index % len(users)]
-                server_id = random.choice(self.session.servers_created)
-                
-                # join
-                metric_join = TestMetrics(operation="join", start_time=time.time())
-                try:
-                    # use join endpoint through invite flow
-                    url = f"{self.api_url}/rooms/join"
-                    payload = {
-                        "access_token": user.access_token,
-                        "room_id_or_alias": server_id
-                    }
-                    async with http_session.post(url, json=payload) as resp:
-                        metric_join.success = resp.status == 200
-                        if resp.status != 200:
-                            metric_join.error = await resp.text()
-                except Exception as e:
-                    metric_join.error = str(e)
-                finally:
-                    metric_join.end_time = time.time()
-                    self.session.add_metric(metric_join)
-                
-                # small delay to simulate real usage
-                await asyncio.sleep(random.uniform(0.1, 0.5))
-                
-                # leave
-                metric_leave = TestMetrics(operation="leave", start_time=time.time())
-                try:
-                    success, error = await user.leave_server(server_id)
-                    metric_leave.success = success
-                    if error:
-                        metric_leave.error = error
-                except Exception as e:
-                    metric_leave.error = str(e)
-                finally:
-                    metric_leave.end_time = time.time()
-                    self.session.add_metric(metric_leave)
-        
-        tasks = [join_leave_once(i % len(users), i) for i in range(iterations)]
-        await asyncio.gather(*tasks, return_exceptions=True)
+        record = self.session.record
+        
+        async def join_leave_once(user_index: int, server_id: str):
+            user = users[user_index % len(users)]
+            
+            # join (through the invite flow); the client methods catch
+            # their own errors, so no metric object or try block is needed
+            start = time.perf_counter_ns()
+            success, error = await user.join_server(server_id)
+            record("join", start, time.perf_counter_ns(), success, error)
+            
+            # small delay to simulate real usage
+            await asyncio.sleep(random.uniform(0.1, 0.5))
+            
+            # leave
+            start = time.perf_counter_ns()
+            success, error = await user.leave_server(server_id)
+            record("leave", start, time.perf_counter_ns(), success, error)
+        
+        if not users or not self.session.servers_created:
+            print("   no users or servers available, skipping")
+            return
+        
+        # draw every target server up front in one call instead of per iteration
+        targets = random.choices(self.session.servers_created, k=iterations)
+        await run_bounded(concurrent, (
+            join_leave_once(i % len(users), server_id) for i, server_id in enumerate(targets)
+        ))
         
         join_stats = self.session.get_stats("join")
         leave_stats = self.session.get_stats("leave")
@@ -509,84 +651,99 @@ class LoadTester:
         
         print(f"   created {len(text_channels)} test channels")
         
-        async def spam_channel(channel_id: str):
-            for msg_idx in range(messages_per_room):
-                metric = TestMetrics(operation="message_send", start_time=time.time())
-                
-                try:
-                    content = f"test message {msg_idx}: {''.join(random.choices(string.ascii_letters, k=50))}"
-                    success, error = await client.send_message(channel_id, content)
-                    metric.success = success
-                    if error:
-                        metric.error = error
-                    if success:
-                        self.session.messages_sent += 1
-                except Exception as e:
-                    metric.error = str(e)
-                finally:
-                    metric.end_time = time.time()
-                    self.session.add_metric(metric)
-                
-                # small delay to avoid overwhelming
-                await asyncio.sleep(0.01)
+        # draw the random text for every message in one call and slice it,
+        # instead of 50 rng calls per message
+        suffix_len = 50
+        filler = random.randbytes(len(text_channels) * messages_per_room * suffix_len).translate(LETTER_TABLE).decode()
         
-        await asyncio.gather(*[spam_channel(ch) for ch in text_channels])
+        async def spam_channel(channel_idx: int, channel_id: str):
+            base = channel_idx * messages_per_room
+            
+            async def send_one(content: str):
+                with timed(self.session, "message_send") as metric:
+                    metric.success, metric.error = await client.send_message(channel_id, content)
+                    if metric.success:
+                        self.session.messages_sent += 1
+            
+            # keep a bounded number of sends in flight per channel instead of
+            # a fixed sleep between serial sends
+            await run_bounded(32, (
+                send_one(f"test message {msg_idx}: {filler[(base + msg_idx) * suffix_len:(base + msg_idx + 1) * suffix_len]}")
+                for msg_idx in range(messages_per_room)
+            ))
+        
+        # throughput is messages over the wall-clock span of the whole burst;
+        # summing per-message latency only holds for serial sends
+        t0 = time.perf_counter()
+        await asyncio.gather(*[spam_channel(i, ch) for i, ch in enumerate(text_channels)])
+        elapsed = time.perf_counter() - t0
         
         stats = self.session.get_stats("message_send")
         print(f"   sent: {self.session.messages_sent} messages")
         print(f"   avg latency: {stats['avg_ms']:.2f}ms")
         print(f"   success rate: {stats['success_rate']:.1f}%")
-        print(f"   throughput: {self.session.messages_sent / (stats['avg_ms'] * stats['count'] / 1000):.1f} msg/sec")
+        print(f"   throughput: {self.session.messages_sent / elapsed:.1f} msg/sec")
     
     async def test_mixed_load(self, http_session: aiohttp.ClientSession, duration_seconds: int, concurrent_users: int):
         """run mixed load for a duration"""
         print(f"\ntest 5: mixed load test ({duration_seconds}s with {concurrent_users} concurrent users)...")
         
         # setup: create servers and users
-        test_servers = []
-        test_users = []
-        
-        # create servers
+        # create servers, then their channels, then users; each phase runs
+        # concurrently instead of one round trip at a time
         setup_client = AgoraClient(self.api_url, self.homeserver_url, http_session)
         await setup_client.register(f"mixed_setup_{int(time.time())}", "testpass123")
-        for i in range(5):
-            sid, _ = await setup_client.create_server(f"MixedLoad_{i}")
-            if sid:
-                cid, _ = await setup_client.create_channel("general", sid, "text")
-                test_servers.append({"server": sid, "channel": cid})
+        created = await gather_bounded(concurrent_users, [
+            setup_client.create_server(f"MixedLoad_{i}") for i in range(5)
+        ])
+        server_ids = [sid for sid, _ in created if sid]
+        channels = await gather_bounded(concurrent_users, [
+            setup_client.create_channel("general", sid, "text") for sid in server_ids
+        ])
+        test_servers = [{"server": sid, "channel": cid} for sid, (cid, _) in zip(server_ids, channels)]
         
         # create users
-        for i in range(concurrent_users):
+        async def make_user(i: int, server: dict) -> Optional[dict]:
             client = AgoraClient(self.api_url, self.homeserver_url, http_session)
             success, _ = await client.register(f"mixed_user_{i}_{int(time.time())}", "testpass123")
-            if success:
-                # join a random server
-                server = random.choice(test_servers)
-                url = f"{self.api_url}/rooms/join"
-                payload = {"access_token": client.access_token, "room_id_or_alias": server["server"]}
-                async with http_session.post(url, json=payload) as resp:
-                    if resp.status == 200:
-                        test_users.append({"client": client, "server": server})
+            if not success:
+                return None
+            # join the server drawn for this user
+            joined, _ = await client.join_server(server["server"])
+            return {"client": client, "server": server} if joined else None
+        
+        # choices() needs a non-empty population; with no servers there is
+        # nothing to join, so no users are made and the phase runs no ops
+        drawn = random.choices(test_servers, k=concurrent_users) if test_servers else []
+        test_users = [u for u in await gather_bounded(concurrent_users, [
+            make_user(i, server) for i, server in enumerate(drawn)
+        ]) if u]
         
         print(f"   setup: {len(test_users)} users in {len(test_servers)} servers")
         
-        start_time = time.time()
-        operation_count = 0
+        # next() on itertools.count is a single C call, no shared rebinding
+        op_counter = itertools.count()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + duration_seconds
+        # pauses are at least 0.1s, which bounds how many ops a task can run
+        max_ops = int(duration_seconds / 0.1) + 1
         
         async def random_operation(user_data: dict):
-            nonlocal operation_count
             client = user_data["client"]
             server = user_data["server"]
+            # draw the whole schedule up front instead of per iteration
+            ops = random.choices(["message", "sync", "members"], k=max_ops)
+            pauses = [random.uniform(0.1, 1.0) for _ in range(max_ops)]
             
-            while time.time() - start_time < duration_seconds:
-                op = random.choice(["message", "sync", "members"])
-                metric = TestMetrics(operation=f"mixed_{op}", start_time=time.time())
-                
-                try:
+            for op, pause in zip(ops, pauses):
+                if loop.time() >= deadline:
+                    break
+                op_index = next(op_counter)
+                with timed(self.session, f"mixed_{op}") as metric:
                     if op == "message":
                         success, _ = await client.send_message(
                             server["channel"], 
-                            f"load test msg {operation_count}"
+                            f"load test msg {op_index}"
                         )
                         metric.success = success
                     elif op == "sync":
@@ -595,19 +752,13 @@ class LoadTester:
                     elif op == "members":
                         members, _ = await client.get_room_members(server["channel"])
                         metric.success = members is not None
-                    
-                    operation_count += 1
-                except Exception as e:
-                    metric.error = str(e)
-                finally:
-                    metric.end_time = time.time()
-                    self.session.add_metric(metric)
                 
-                await asyncio.sleep(random.uniform(0.1, 1.0))
+                await asyncio.sleep(pause)
         
+        t0 = time.perf_counter()
         await asyncio.gather(*[random_operation(u) for u in test_users])
-        
-        total_time = time.time() - start_time
+        total_time = time.perf_counter() - t0
+        operation_count = next(op_counter)
         print(f"   completed {operation_count} operations in {total_time:.1f}s")
         print(f"   throughput: {operation_count/total_time:.1f} ops/sec")
     
@@ -626,9 +777,16 @@ class LoadTester:
                 print(f"   count: {stats['count']}")
                 print(f"   success: {stats['success_rate']:.1f}% ({stats['count'] - stats['total_errors']}/{stats['count']})")
                 print(f"   latency: avg={stats['avg_ms']:.2f}ms, median={stats['median_ms']:.2f}ms")
+                print(f"            p95={stats['p95_ms']:.2f}ms, p99={stats['p99_ms']:.2f}ms")
                 print(f"            min={stats['min_ms']:.2f}ms, max={stats['max_ms']:.2f}ms")
                 if stats['stddev_ms'] > 0:
                     print(f"   stddev: {stats['stddev_ms']:.2f}ms")
+                print(f"   rate: {stats['rate_per_sec']:.1f} ops/sec per in-flight request")
+        
+        if self.session.errors:
+            print(f"\nlast {len(self.session.errors)} errors:")
+            for error in self.session.errors:
+                print(f"   - {error}")
         
         print("\n" + "="*70)
         print(f"test suite completed at {datetime.now()}")
@@ -638,65 +796,72 @@ class LoadTester:
 class DockerLogMonitor:
     """monitor docker logs in real-time"""
     
-    def __init__(self, services: list[str]):
+    def __init__(self, services: list[str], max_lines: int = 2000):
         self.services = services
         self.running = False
-        self.threads = []
-        self.log_queue = queue.Queue()
+        self.tasks: list[asyncio.Task] = []
+        self.processes: list[asyncio.subprocess.Process] = []
+        # bounded per-service ring buffers so a chatty container can't grow memory
+        self.logs: dict[str, deque] = {s: deque(maxlen=max_lines) for s in services}
+        self.line_counts: dict[str, int] = {s: 0 for s in services}
         
-    def start(self):
+    async def start(self):
         """start monitoring logs"""
         self.running = True
         for service in self.services:
-            t = threading.Thread(target=self._monitor_service, args=(service,))
-            t.daemon = True
-            t.start()
-            self.threads.append(t)
+            self.tasks.append(asyncio.create_task(self._monitor_service(service)))
         print(f"\nstarted monitoring docker logs for: {', '.join(self.services)}\n")
     
-    def stop(self):
+    async def stop(self):
         """stop monitoring"""
         self.running = False
-        for t in self.threads:
-            t.join(timeout=2)
+        for process in self.processes:
+            try:
+                process.terminate()
+            except ProcessLookupError:
+                pass  # already exited
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        for process in self.processes:
+            try:
+                await asyncio.wait_for(process.wait(), timeout=2)
+            except asyncio.TimeoutError:
+                process.kill()
     
-    def _monitor_service(self, service: str):
+    async def _monitor_service(self, service: str):
         """monitor a single service"""
+        container = f"agora_{service}" if not service.startswith("agora_") else service
         try:
-            process = subprocess.Popen(
-                ["docker", "logs", "-f", f"--tail=10", f"agora_{service}" if not service.startswith("agora_") else service],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                universal_newlines=True
+            process = await asyncio.create_subprocess_exec(
+                "docker", "logs", "-f", "--tail=10", container,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                limit=1 << 20  # tolerate long log lines
             )
+            self.processes.append(process)
             
+            buffer = self.logs[service]
             while self.running:
-                line = process.stdout.readline()
-                if line:
-                    self.log_queue.put((service, line.strip()))
-                else:
+                line = await process.stdout.readline()
+                if not line:
                     break
+                buffer.append(line.decode(errors="replace").strip())
+                self.line_counts[service] += 1
         except Exception as e:
-            self.log_queue.put((service, f"error: {e}"))
+            self.logs[service].append(f"error: {e}")
+            self.line_counts[service] += 1
     
     def print_recent_logs(self, lines: int = 50):
-        """print recent logs from queue"""
+        """print recent logs from the per-service buffers"""
         print(f"\nrecent docker logs (last {lines} lines per service):")
         print("-"*70)
         
-        # group logs by service
-        logs_by_service: dict[str, list[str]] = {s: [] for s in self.services}
-        
-        # drain queue
-        while not self.log_queue.empty():
-            service, line = self.log_queue.get()
-            if service in logs_by_service:
-                logs_by_service[service].append(line)
-        
-        # print grouped
-        for service, logs in logs_by_service.items():
-            print(f"\n{service.upper()} (showing last {min(lines, len(logs))} of {len(logs)}):")
-            for line in logs[-lines:]:
+        for service in self.services:
+            logs = self.logs[service]
+            shown = list(logs)[-lines:]
+            print(f"\n{service.upper()} (showing last {len(shown)} of {self.line_counts[service]}):")
+            for line in shown:
                 print(f"   {line}")
 
 
@@ -710,6 +875,8 @@ async def main():
     parser.add_argument('--message-count', type=int, default=100, help='messages per room')
     parser.add_argument('--load-duration', type=int, default=60, help='mixed load test duration (seconds)')
     parser.add_argument('--concurrent-users', type=int, default=10, help='concurrent users for load test')
+    parser.add_argument('--connector-limit', type=int, default=None,
+                       help='max pooled connections (default: max(256, 8 x concurrent users); 0 = unlimited)')
     parser.add_argument('--monitor-docker', action='store_true', help='monitor docker logs during tests')
     parser.add_argument('--skip', nargs='+', choices=['registration', 'servers', 'joinleave', 'messages', 'mixed'], 
                        help='skip specific tests')
@@ -730,13 +897,14 @@ async def main():
         'message_rooms': 3,
         'load_test_duration': args.load_duration,
         'concurrent_load_users': args.concurrent_users,
+        'connector_limit': args.connector_limit,
     }
     
     # start docker monitoring if requested
     docker_monitor = None
     if args.monitor_docker:
         docker_monitor = DockerLogMonitor(['conduit', 'agora_livekit', 'api'])
-        docker_monitor.start()
+        await docker_monitor.start()
     
     try:
         # run tests
@@ -744,10 +912,13 @@ async def main():
         tester = LoadTester(args.api_url, args.homeserver, session)
         await tester.run_test_suite(config)
         
-        # print docker logs if monitoring
+        # print docker logs if monitoring, ahead of the summary so the
+        # results stay the last thing on screen
         if docker_monitor:
             docker_monitor.print_recent_logs()
         
+        tester.print_results()
+        
     except KeyboardInterrupt:
         print("\n\ntest interrupted by user")
     except Exception as e:
@@ -756,8 +927,9 @@ async def main():
         traceback.print_exc()
     finally:
         if docker_monitor:
-            docker_monitor.stop()
+            await docker_monitor.stop()
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    run = uvloop.run if uvloop and sys.platform != "win32" else asyncio.run
+    run(main())
@@ -5,48 +5,104 @@ Chaos Test - Deliberately try to break things
 
 import asyncio
 import aiohttp
+import argparse
+import itertools
+import json
 import random
-import time
 import sys
-from typing import List
+from contextlib import nullcontext
+import time
+from typing import List, Optional
+
+try:
+    import orjson
+    dumps = orjson.dumps
+    loads = orjson.loads
+except ImportError:  # optional, falls back to the stdlib codec
+    orjson = None
+    loads = json.loads
+    def dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+try:
+    import uvloop  # optional, libuv event loop (no windows support)
+except ImportError:
+    uvloop = None
+
+# join/leave gets a tighter budget than the session-wide 5s default; built
+# once instead of per post
+JOIN_LEAVE_TIMEOUT = aiohttp.ClientTimeout(total=3)
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# (path, pre-encoded body) pairs; the payloads never change between runs
+MALFORMED_BODIES = [(path, dumps(body)) for path, body in [
+    # missing required fields
+    ("/register", {}),
+    ("/rooms/create", {"access_token": "invalid"}),
+    # invalid types
+    ("/rooms/create", {"access_token": 123, "name": None}),
+    # empty strings
+    ("/register", {"username": "", "password": ""}),
+    # very long strings
+    ("/rooms/create", {"access_token": "x"*10000, "name": "test"}),
+]]
 
 
 class ChaosMonkey:
     """Agent of chaos"""
     
-    def __init__(self, api_url: str, session: aiohttp.ClientSession):
+    def __init__(self, api_url: str, session: aiohttp.ClientSession, concurrency: int = 512):
         self.api_url = api_url
         self.session = session
+        # built once rather than re-formatted in every task
+        self._url_register = f"{api_url}/register"
+        self._url_create = f"{api_url}/rooms/create"
+        self._url_join = f"{api_url}/rooms/join"
+        self._url_leave = f"{api_url}/rooms/leave"
+        # caps in-flight posts across every phase; sized to the connection
+        # pool so requests wait here instead of in the connector queue
+        self.in_flight = asyncio.Semaphore(concurrency) if concurrency > 0 else nullcontext()
         self.tokens: List[str] = []
         self.servers: List[str] = []
         self.errors: List[str] = []
+        # seeded from the clock once so names stay unique across runs too,
+        # without a time() call per registration
+        self._uid_counter = itertools.count(int(time.time()*1000))
         
     async def spam_registrations(self, count: int):
         """rapid-fire registrations"""
         print(f"spamming {count} rapid registrations...")
+        # one slot per registration, filled by index so the list never grows
+        tokens: List[Optional[str]] = [None] * count
+        # bound once; the inner tasks would otherwise look these up per hit
+        add_error = self.errors.append
+        post, url = self.session.post, self._url_register
         
         async def register_one(i: int):
-            try:
-                async with self.session.post(
-                    f"{self.api_url}/register",
-                    json={
-                        "username": f"chaos_{i}_{int(time.time()*1000)}",
-                        "password": "x",
-                        "initial_device_display_name": "chaos"
-                    },
-                    timeout=aiohttp.ClientTimeout(total=5)
-                ) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        self.tokens.append(data.get("access_token"))
-                    else:
-                        text = await resp.text()
-                        if "m_user_in_use" not in text:  # expected for duplicates
-                            self.errors.append(f"registration {i}: {resp.status}")
-            except Exception as e:
-                self.errors.append(f"registration {i}: {e}")
-        
-        await asyncio.gather(*[register_one(i) for i in range(count)])
+            async with self.in_flight:
+                try:
+                    async with post(
+                        url,
+                        data=dumps({
+                            "username": f"chaos_{i}_{next(self._uid_counter)}",
+                            "password": "x",
+                            "initial_device_display_name": "chaos"
+                        }),
+                        headers=JSON_HEADERS
+                    ) as resp:
+                        if resp.status == 200:
+                            data = await resp.json(loads=loads)
+                            tokens[i] = data.get("access_token")
+                        else:
+                            await resp.read()  # drain so the connection is reused
+                            add_error(f"registration {i}: {resp.status}")
+                except Exception as e:
+                    add_error(f"registration {i}: {e}")
+        
+        async with asyncio.TaskGroup() as tg:
+            for i in range(count):
+                tg.create_task(register_one(i))
+        self.tokens.extend(t for t in tokens if t)
         print(f"   created {len(self.tokens)} users, {len(self.errors)} errors")
     
     async def concurrent_server_creation(self):
@@ -56,24 +112,31 @@ class ChaosMonkey:
             return
             
         print(f"creating servers with {len(self.tokens)} users concurrently...")
+        creators = self.tokens[:10]
+        servers: List[Optional[str]] = [None] * (len(creators) * 5)
+        add_error = self.errors.append
+        post, url = self.session.post, self._url_create
         
-        async def create_many(token: str, user_idx: int):
-            for i in range(5):
+        # each user's five creations are independent, so all of them run at once
+        async def create_one(token: str, user_idx: int, i: int):
+            async with self.in_flight:
                 try:
-                    async with self.session.post(
-                        f"{self.api_url}/rooms/create",
-                        json={"access_token": token, "name": f"chaos_server_{user_idx}_{i}", "is_space": True},
-                        timeout=aiohttp.ClientTimeout(total=5)
+                    async with post(
+                        url,
+                        data=dumps({"access_token": token, "name": f"chaos_server_{user_idx}_{i}", "is_space": True}),
+                        headers=JSON_HEADERS
                     ) as resp:
                         if resp.status == 200:
-                            data = await resp.json()
-                            self.servers.append(data.get("room_id"))
+                            data = await resp.json(loads=loads)
+                            servers[user_idx * 5 + i] = data.get("room_id")
                 except Exception as e:
-                    self.errors.append(f"server creation: {e}")
+                    add_error(f"server creation: {e}")
         
-        await asyncio.gather(*[
-            create_many(token, i) for i, token in enumerate(self.tokens[:10])
-        ])
+        async with asyncio.TaskGroup() as tg:
+            for user_idx, token in enumerate(creators):
+                for i in range(5):
+                    tg.create_task(create_one(token, user_idx, i))
+        self.servers.extend(s for s in servers if s)
         print(f"   created {len(self.servers)} servers")
     
     async def rapid_join_leave(self, iterations: int):
@@ -83,63 +146,64 @@ class ChaosMonkey:
             return
             
         print(f"rapid join/leave ({iterations} iterations)...")
+        post, url_join, url_leave = self.session.post, self._url_join, self._url_leave
         
         async def jiggle(token: str):
-            for _ in range(iterations):
-                server = random.choice(self.servers)
-                try:
-                    # join
-                    async with self.session.post(
-                        f"{self.api_url}/rooms/join",
-                        json={"access_token": token, "room_id_or_alias": server},
-                        timeout=aiohttp.ClientTimeout(total=3)
-                    ) as resp:
-                        pass  # don't care about result
+            # every round's target drawn in one call up front
+            for server in random.choices(self.servers, k=iterations):
+                async with self.in_flight:
+                    try:
+                        # join
+                        async with post(
+                            url_join,
+                            data=dumps({"access_token": token, "room_id_or_alias": server}),
+                            headers=JSON_HEADERS,
+                            timeout=JOIN_LEAVE_TIMEOUT
+                        ) as resp:
+                            # result doesn't matter, but an undrained body
+                            # gets the connection closed instead of reused
+                            await resp.read()
                     
-                    # immediate leave
-                    async with self.session.post(
-                        f"{self.api_url}/rooms/leave",
-                        json={"access_token": token, "room_id": server},
-                        timeout=aiohttp.ClientTimeout(total=3)
-                    ) as resp:
-                        pass
+                        # immediate leave
+                        async with post(
+                            url_leave,
+                            data=dumps({"access_token": token, "room_id": server}),
+                            headers=JSON_HEADERS,
+                            timeout=JOIN_LEAVE_TIMEOUT
+                        ) as resp:
+                            await resp.read()
                         
-                except Exception:
-                    pass  # expected to have some failures
+                    except Exception:
+                        pass  # expected to have some failures
         
-        await asyncio.gather(*[
-            jiggle(token) for token in self.tokens[:5]
-        ])
+        async with asyncio.TaskGroup() as tg:
+            for token in self.tokens[:5]:
+                tg.create_task(jiggle(token))
         print("   join/leave chaos complete")
     
     async def malformed_requests(self):
         """send malformed data"""
         print("sending malformed requests...")
+        add_error = self.errors.append
         
-        malformations = [
-            # missing required fields
-            {"url": f"{self.api_url}/register", "json": {}},
-            {"url": f"{self.api_url}/rooms/create", "json": {"access_token": "invalid"}},
-            # invalid types
-            {"url": f"{self.api_url}/rooms/create", "json": {"access_token": 123, "name": None}},
-            # empty strings
-            {"url": f"{self.api_url}/register", "json": {"username": "", "password": ""}},
-            # very long strings
-            {"url": f"{self.api_url}/rooms/create", "json": {"access_token": "x"*10000, "name": "test"}},
-        ]
-        
-        for malformed in malformations:
-            try:
-                async with self.session.post(
-                    malformed["url"],
-                    json=malformed["json"],
-                    timeout=aiohttp.ClientTimeout(total=5)
-                ) as resp:
-                    # should get 400, not crash
-                    if resp.status >= 500:
-                        self.errors.append(f"server crash on malformed: {resp.status}")
-            except Exception as e:
-                self.errors.append(f"exception on malformed: {e}")
+        # each payload probes a different code path, so fire them together
+        async def send_malformed(path: str, body: bytes):
+            async with self.in_flight:
+                try:
+                    async with self.session.post(
+                        f"{self.api_url}{path}",
+                        data=body,
+                        headers=JSON_HEADERS
+                    ) as resp:
+                        # should get 400, not crash
+                        if resp.status >= 500:
+                            add_error(f"server crash on malformed: {resp.status}")
+                except Exception as e:
+                    add_error(f"exception on malformed: {e}")
+        
+        async with asyncio.TaskGroup() as tg:
+            for path, body in MALFORMED_BODIES:
+                tg.create_task(send_malformed(path, body))
         
         print("   malformed request testing complete")
     
@@ -151,24 +215,37 @@ class ChaosMonkey:
             return
             
         token = self.tokens[0]
+        post, url = self.session.post, self._url_create
+        # every racer sends the identical body, so encode it once
+        body = dumps({"access_token": token, "name": "race_channel", "is_space": False})
         
         # try to create the same channel multiple times simultaneously
         async def create_duplicate(i: int):
-            try:
-                async with self.session.post(
-                    f"{self.api_url}/rooms/create",
-                    json={"access_token": token, "name": "race_channel", "is_space": False},
-                    timeout=aiohttp.ClientTimeout(total=5)
-                ) as resp:
-                    return resp.status
-            except Exception as e:
-                return str(e)
-        
-        results = await asyncio.gather(*[create_duplicate(i) for i in range(10)])
-        print(f"   race results: {set(results)}")
+            async with self.in_flight:
+                try:
+                    async with post(
+                        url,
+                        data=body,
+                        headers=JSON_HEADERS
+                    ) as resp:
+                        return resp.status
+                except Exception as e:
+                    return str(e)
+        
+        # two distinct outcomes already show the race; don't wait on stragglers
+        seen = set()
+        async with asyncio.TaskGroup() as tg:
+            tasks = [tg.create_task(create_duplicate(i)) for i in range(10)]
+            for fut in asyncio.as_completed(tasks):
+                seen.add(await fut)
+                if len(seen) >= 2:
+                    break
+            for task in tasks:
+                task.cancel()  # no-op for the ones already done
+        print(f"   race results: {seen}")
 
 
-async def run_chaos_tests(api_url: str):
+async def run_chaos_tests(api_url: str, connector_limit: int = 512):
     """run all chaos tests"""
     print("\nagora chaos tests")
     print("="*60)
@@ -176,8 +253,19 @@ async def run_chaos_tests(api_url: str):
     print("some errors are expected and ok.")
     print("="*60 + "\n")
     
-    async with aiohttp.ClientSession() as session:
-        monkey = ChaosMonkey(api_url, session)
+    # one pooled session for every phase so connections are reused across
+    # the thousands of short posts; 5s is the default per-request budget
+    # the pool must be at least as wide as the gather fan-out or the chaos
+    # phases end up measuring the connector queue; 0 removes the cap
+    connector = aiohttp.TCPConnector(
+        limit=connector_limit,
+        limit_per_host=connector_limit,
+        keepalive_timeout=75,
+        ttl_dns_cache=300
+    )
+    timeout = aiohttp.ClientTimeout(total=5)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        monkey = ChaosMonkey(api_url, session, concurrency=connector_limit)
         
         await monkey.spam_registrations(50)
         await monkey.concurrent_server_creation()
@@ -194,8 +282,7 @@ async def run_chaos_tests(api_url: str):
         
         if monkey.errors:
             print("\nsample errors:")
-            for err in monkey.errors[:5]:
-                print(f"   - {err}")
+            print("\n".join(f"   - {err}" for err in monkey.errors[:5]))
         
         if len(monkey.errors) < 10:
             print("\nsystem handled chaos reasonably well")
@@ -204,5 +291,10 @@ async def run_chaos_tests(api_url: str):
 
 
 if __name__ == '__main__':
-    api_url = sys.argv[1] if len(sys.argv) > 1 else "http://localhost:3000"
-    asyncio.run(run_chaos_tests(api_url))
+    parser = argparse.ArgumentParser(description='agora chaos tests')
+    parser.add_argument('api_url', nargs='?', default='http://localhost:3000', help='agora api url')
+    parser.add_argument('--connector-limit', type=int, default=512,
+                        help='max pooled connections (0 = unlimited)')
+    args = parser.parse_args()
+    run = uvloop.run if uvloop and sys.platform != "win32" else asyncio.run
+    run(run_chaos_tests(args.api_url, args.connector_limit))
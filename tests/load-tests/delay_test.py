@@ -11,14 +11,53 @@ Specifically tests timing issues mentioned in bug reports:
 
 import asyncio
 import aiohttp
+import json
 import time
 import sys
-from typing import List, Tuple
+import traceback
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
-from statistics import mean, median
+from math import fsum
 
+try:
+    import orjson
+    dumps = orjson.dumps
+    loads = orjson.loads
+except ImportError:  # optional, falls back to the stdlib codec
+    orjson = None
+    loads = json.loads
+    def dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
 
-@dataclass
+
+try:
+    import uvloop  # optional, libuv event loop (no windows support)
+except ImportError:
+    uvloop = None
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# what a helper request can legitimately fail with: transport errors,
+# timeouts and undecodable bodies. anything else is a bug and should surface
+REQUEST_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, ValueError)
+
+
+# per-phase output buffer; phases run concurrently, so each one collects its
+# lines here and main() prints them in order once everything has finished
+_phase_output: ContextVar[Optional[List[str]]] = ContextVar("phase_output", default=None)
+
+
+def percentile(ordered, pct: float) -> float:
+    """linear-interpolated percentile of an already sorted sequence"""
+    rank = (len(ordered) - 1) * pct / 100
+    lo = int(rank)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (rank - lo)
+
+
+@dataclass(slots=True, frozen=True)
 class TimingResult:
     operation: str
     target_ms: float
@@ -29,61 +68,178 @@ class TimingResult:
 class DelayTester:
     """Test specific timing scenarios"""
     
+    # users shared by every test; all of them join the fixture server and its
+    # text channel, so setup happens once instead of per test
+    FIXTURE_ROLES = ("owner", "voice", "sender", "receiver", "refresh")
+    
     def __init__(self, api_url: str, session: aiohttp.ClientSession):
         self.api_url = api_url
         self.session = session
+        # endpoint urls are fixed per tester, build them once
+        self._url_register = f"{api_url}/register"
+        self._url_create = f"{api_url}/rooms/create"
+        self._url_join = f"{api_url}/rooms/join"
+        self._url_leave = f"{api_url}/rooms/leave"
+        self._url_send = f"{api_url}/rooms/send"
+        self._url_sync = f"{api_url}/sync"
+        self._url_rooms = f"{api_url}/rooms"
+        self._url_voice_participants = f"{api_url}/voice/participants"
         self.results: List[TimingResult] = []
+        # encoded '{"access_token":"...",' per token, so authenticated bodies
+        # only encode their variable fields
+        self._auth_prefixes: Dict[str, bytes] = {}
+        # read-only GETs currently on the wire, keyed by endpoint + arguments
+        self._in_flight: Dict[tuple, asyncio.Task] = {}
+        self._waiters: Counter = Counter()
+        # "helper: ErrorType" -> count, reported in the summary so connection
+        # churn shows up as errors rather than only as latency
+        self.request_errors: Counter = Counter()
+        # filled in by setup_fixtures()
+        self.fixture_users: Dict[str, dict] = {}
+        self.fixture_server_id: Optional[str] = None
+        self.fixture_text_channel: Optional[str] = None
+        self.fixture_voice_channel: Optional[str] = None
+    
+    def note_error(self, operation: str, error: BaseException):
+        self.request_errors[f"{operation}: {type(error).__name__}"] += 1
+    
+    async def warm_pool(self, size: int):
+        """open keep-alive connections up front so the first measurement doesn't pay for handshakes"""
+        async def ping():
+            try:
+                async with self.session.head(f"{self.api_url}/health") as resp:
+                    await resp.read()
+            except Exception:
+                pass  # warmup is best-effort
+
+        await asyncio.gather(*[ping() for _ in range(size)])
+    
+    async def single_flight(self, key: tuple, factory):
+        """share one in-flight request between concurrent identical callers"""
+        task = self._in_flight.get(key)
+        if task is None:
+            task = self._in_flight[key] = asyncio.ensure_future(factory())
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # shield so one caller timing out doesn't cancel the others' request,
+        # but cancel it once nobody is left waiting, so an abandoned long-poll
+        # doesn't run on to the session timeout
+        self._waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+                task.cancel()  # no-op once it has finished
+    
+    def auth_body(self, token: str, payload: dict) -> bytes:
+        """encode an authenticated request body"""
+        prefix = self._auth_prefixes.get(token)
+        if prefix is None:
+            prefix = self._auth_prefixes[token] = dumps({"access_token": token})[:-1] + b","
+        return prefix + dumps(payload)[1:]
+    
+    def log(self, message: str = ""):
+        """print, or buffer when running inside a concurrent phase"""
+        buffer = _phase_output.get()
+        if buffer is None:
+            print(message)
+        else:
+            buffer.append(message)
+    
+    async def run_phase(self, test) -> Tuple[List[TimingResult], List[str]]:
+        """run one test with its own output buffer; errors stay inside the phase"""
+        buffer: List[str] = []
+        token = _phase_output.set(buffer)
+        try:
+            return await test(), buffer
+        except Exception as e:
+            buffer.append(f"\ntest error: {e}")
+            buffer.append(traceback.format_exc().rstrip())
+            return [], buffer
+        finally:
+            _phase_output.reset(token)
+    
+    async def poll_until(self, predicate, max_wait: float = 5.0, interval: float = 0.005,
+                         factor: float = 1.5, cap: float = 0.1) -> Tuple[bool, float]:
+        """
+        poll an async predicate with exponential backoff until it holds.
+        returns whether it held and the time.perf_counter() of the check that saw it,
+        so latency isn't quantized to the poll interval
+        """
+        async def poll() -> float:
+            nonlocal interval
+            while not await predicate():
+                await asyncio.sleep(interval)
+                interval = min(cap, interval * factor)
+            return time.perf_counter()
+        
+        # wait_for bounds the whole wait, including a predicate request that
+        # stalls past the budget
+        try:
+            return True, await asyncio.wait_for(poll(), max_wait)
+        except asyncio.TimeoutError:
+            return False, time.perf_counter()
+        
+    async def setup_fixtures(self) -> bool:
+        """create the users, server and channels the tests share"""
+        self.log("\nsetting up shared fixtures...")
+        users = await asyncio.gather(*[self.create_user(f"fixture_{role}") for role in self.FIXTURE_ROLES])
+        if not all(users):
+            self.log("   failed to create fixture users")
+            return False
+        self.fixture_users = dict(zip(self.FIXTURE_ROLES, users))
+        
+        owner = self.fixture_users["owner"]["token"]
+        server_id = self.fixture_server_id = await self.create_server(owner, "DelayTestServer")
+        if not server_id:
+            self.log("   failed to create fixture server")
+            return False
+        self.fixture_text_channel, self.fixture_voice_channel = await asyncio.gather(
+            self.create_channel(owner, server_id, "delay-text", "text"),
+            self.create_channel(owner, server_id, "delay-voice", "voice")
+        )
+        if not self.fixture_text_channel or not self.fixture_voice_channel:
+            self.log("   failed to create fixture channels")
+            return False
         
+        await asyncio.gather(*[
+            self.join_room(user["token"], room_id)
+            for role, user in self.fixture_users.items() if role != "owner"
+            for room_id in (server_id, self.fixture_text_channel)
+        ])
+        self.log(f"   {len(users)} users in {server_id}")
+        return True
+    
     async def test_voice_disconnect_delay(self) -> List[TimingResult]:
         """
         test: how long does it take for participant list to update after disconnect?
         expected: < 500ms
         """
-        print("\ntesting voice disconnect timing...")
+        self.log("\ntesting voice disconnect timing...")
         results = []
         
-        # create test user
-        user1 = await self.create_user("voice_test_1")
-        user2 = await self.create_user("voice_test_2")
-        
-        if not user1 or not user2:
-            print("   failed to create test users")
-            return results
-        
-        # create server with voice channel
-        server_id = await self.create_server(user1["token"], "VoiceDelayTest")
-        channel_id = await self.create_channel(user1["token"], server_id, "voice-test", "voice")
-        
-        if not channel_id:
-            print("   failed to create voice channel")
-            return results
+        user2 = self.fixture_users["voice"]
+        channel_id = self.fixture_voice_channel
         
         # user 2 joins voice
         await self.join_room(user2["token"], channel_id)
         await asyncio.sleep(1)  # give time for join
         
         # measure time for disconnect to reflect
-        start = time.time()
+        await self.warm_pool(1)  # an idle keep-alive socket for the timed request
+        start = time.perf_counter()
         
         # simulate disconnect by leaving
         await self.leave_room(user2["token"], channel_id)
         
-        # poll until user disappears
-        max_wait = 5.0  # max 5 seconds
-        check_interval = 0.05  # check every 50ms
-        elapsed = 0
-        
-        while elapsed < max_wait:
-            await asyncio.sleep(check_interval)
-            elapsed += check_interval
-            
-            # check participants
-            participants = await self.get_voice_participants(channel_id)
-            if user2["user_id"] not in participants:
-                break
+        # poll until user disappears (max 5 seconds)
+        async def user2_gone() -> bool:
+            # a failed lookup is not evidence the user left
+            return await self.is_voice_participant(channel_id, user2["user_id"]) is False
         
-        actual_time = (time.time() - start) * 1000
-        success = elapsed < max_wait
+        success, seen_at = await self.poll_until(user2_gone, max_wait=5.0)
+        actual_time = (seen_at - start) * 1000
         
         result = TimingResult(
             operation="voice_disconnect_propagation",
@@ -94,7 +250,7 @@ class DelayTester:
         results.append(result)
         
         status = "pass" if success else "fail"
-        print(f"   {status} disconnect propagation: {actual_time:.1f}ms (target: <500ms)")
+        self.log(f"   {status} disconnect propagation: {actual_time:.1f}ms (target: <500ms)")
         
         return results
     
@@ -103,51 +259,48 @@ class DelayTester:
         test: how long for message to appear in sync?
         expected: < 1000ms
         """
-        print("\ntesting message sync timing...")
+        self.log("\ntesting message sync timing...")
         results = []
         
-        # create test users
-        sender = await self.create_user("msg_sender")
-        receiver = await self.create_user("msg_receiver")
-        
-        if not sender or not receiver:
-            return results
+        sender = self.fixture_users["sender"]
+        receiver = self.fixture_users["receiver"]
+        room_id = self.fixture_text_channel
         
-        # create dm room
-        room_id = await self.create_dm_room(sender["token"], receiver["user_id"])
-        
-        # receiver starts listening
-        sync_token = None
+        # receiver starts listening; take a baseline batch token first so the
+        # long-polls below only wait for events newer than the send
+        data, _ = await self.sync(receiver["token"])
+        sync_token = data.get("next_batch") if data else None
         
         # send message
         msg_content = f"test message {time.time()}"
-        send_start = time.time()
+        await self.warm_pool(1)  # an idle keep-alive socket for the timed request
+        send_start = time.perf_counter()
         
         await self.send_message(sender["token"], room_id, msg_content)
-        send_time = (time.time() - send_start) * 1000
+        send_time = (time.perf_counter() - send_start) * 1000
         
-        # wait for message to appear in receiver's sync
+        # wait for message to appear in receiver's sync. /sync with a since
+        # token long-polls (the api asks the homeserver for timeout=30000), so
+        # each call returns as soon as new events land instead of on a poll tick
         max_wait = 5.0
-        check_interval = 0.1
-        elapsed = 0
+        deadline = send_start + max_wait
         found = False
         
-        while elapsed < max_wait:
-            await asyncio.sleep(check_interval)
-            elapsed += check_interval
-            
-            data, _ = await self.sync(receiver["token"], sync_token)
-            if data and "messages" in data:
-                for msg in data["messages"]:
-                    if msg.get("content") == msg_content:
-                        found = True
-                        break
-            if found:
+        while not found:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                data, _ = await asyncio.wait_for(self.sync(receiver["token"], sync_token), remaining)
+            except asyncio.TimeoutError:
                 break
-            if data and "next_batch" in data:
-                sync_token = data["next_batch"]
+            if not data:
+                await asyncio.sleep(0.1)  # error response, don't hammer the api
+                continue
+            found = any(msg.get("content") == msg_content for msg in data.get("messages", []))
+            sync_token = data.get("next_batch", sync_token)
         
-        total_time = (time.time() - send_start) * 1000
+        total_time = (time.perf_counter() - send_start) * 1000
         
         result = TimingResult(
             operation="message_sync_propagation",
@@ -165,9 +318,9 @@ class DelayTester:
         )
         results.append(result2)
         
-        print(f"   send latency: {send_time:.1f}ms")
+        self.log(f"   send latency: {send_time:.1f}ms")
         status = "pass" if found else "fail"
-        print(f"   {status} sync propagation: {total_time:.1f}ms")
+        self.log(f"   {status} sync propagation: {total_time:.1f}ms")
         
         return results
     
@@ -176,37 +329,23 @@ class DelayTester:
         test: how long for new server to appear in room list?
         expected: < 500ms
         """
-        print("\ntesting server list refresh timing...")
+        self.log("\ntesting server list refresh timing...")
         results = []
         
-        user = await self.create_user("server_refresh_test")
-        if not user:
-            return results
-        
-        # get initial list
-        initial_rooms = await self.get_joined_rooms(user["token"])
+        user = self.fixture_users["refresh"]
         
         # create server
-        start = time.time()
+        await self.warm_pool(1)  # an idle keep-alive socket for the timed request
+        start = time.perf_counter()
         server_id = await self.create_server(user["token"], f"RefreshTest_{int(time.time())}")
-        creation_time = (time.time() - start) * 1000
+        creation_time = (time.perf_counter() - start) * 1000
         
         # wait for it to appear in list
-        max_wait = 3.0
-        check_interval = 0.05
-        elapsed = 0
-        found = False
+        async def server_listed() -> bool:
+            return await self.room_listed(user["token"], server_id) is True
         
-        while elapsed < max_wait:
-            await asyncio.sleep(check_interval)
-            elapsed += check_interval
-            
-            rooms = await self.get_joined_rooms(user["token"])
-            if server_id in rooms:
-                found = True
-                break
-        
-        total_time = (time.time() - start) * 1000
+        found, seen_at = await self.poll_until(server_listed, max_wait=3.0)
+        total_time = (seen_at - start) * 1000
         
         result = TimingResult(
             operation="server_list_refresh",
@@ -217,7 +356,7 @@ class DelayTester:
         results.append(result)
         
         status = "pass" if result.success else "fail"
-        print(f"   {status} server list refresh: {total_time:.1f}ms (target: <500ms)")
+        self.log(f"   {status} server list refresh: {total_time:.1f}ms (target: <500ms)")
         
         return results
     
@@ -226,24 +365,22 @@ class DelayTester:
         test: how long for channel to be usable after creation?
         expected: < 300ms
         """
-        print("\ntesting channel creation timing...")
+        self.log("\ntesting channel creation timing...")
         results = []
         
-        user = await self.create_user("channel_test")
-        if not user:
-            return results
-        
-        server_id = await self.create_server(user["token"], "ChannelTimingTest")
+        user = self.fixture_users["owner"]
+        server_id = self.fixture_server_id
         
         # create channel and immediately try to send message
-        start = time.time()
+        await self.warm_pool(1)  # an idle keep-alive socket for the timed request
+        start = time.perf_counter()
         channel_id = await self.create_channel(user["token"], server_id, "test-chan", "text")
-        creation_time = (time.time() - start) * 1000
+        creation_time = (time.perf_counter() - start) * 1000
         
         # try to send message immediately
-        msg_start = time.time()
+        msg_start = time.perf_counter()
         success = await self.send_message(user["token"], channel_id, "immediate message")
-        msg_time = (time.time() - msg_start) * 1000
+        msg_time = (time.perf_counter() - msg_start) * 1000
         
         result = TimingResult(
             operation="channel_creation_to_usable",
@@ -254,7 +391,7 @@ class DelayTester:
         results.append(result)
         
         status = "pass" if success else "fail"
-        print(f"   {status} creation+usable: {creation_time + msg_time:.1f}ms")
+        self.log(f"   {status} creation+usable: {creation_time + msg_time:.1f}ms")
         
         return results
     
@@ -262,57 +399,53 @@ class DelayTester:
         """
         test: how does latency degrade under concurrent load?
         """
-        print("\ntesting latency under concurrent load...")
+        self.log("\ntesting latency under concurrent load...")
         results = []
         
-        # create multiple users
-        users = []
-        for i in range(5):
-            user = await self.create_user(f"load_user_{i}")
-            if user:
-                users.append(user)
-        
-        if len(users) < 3:
-            print("   not enough users created")
-            return results
-        
-        # create shared server
-        server_id = await self.create_server(users[0]["token"], "LoadTestServer")
-        channel_id = await self.create_channel(users[0]["token"], server_id, "load-chan", "text")
-        
-        # all users join
-        for user in users[1:]:
-            await self.join_room(user["token"], server_id)
+        # every fixture user is already in the shared text channel
+        users = list(self.fixture_users.values())
+        channel_id = self.fixture_text_channel
         
         # concurrent message sending
         latencies = []
         
         async def send_and_measure(user):
-            start = time.time()
+            start = time.perf_counter()
             await self.send_message(user["token"], channel_id, f"load test from {user['user_id']}")
-            return (time.time() - start) * 1000
+            return (time.perf_counter() - start) * 1000
         
         # send 10 rounds of concurrent messages
+        round_rates = []
         for round_num in range(10):
-            start_round = time.time()
+            start_round = time.perf_counter()
             round_latencies = await asyncio.gather(*[
                 send_and_measure(user) for user in users
             ])
             latencies.extend(round_latencies)
-            await asyncio.sleep(0.1)  # brief pause between rounds
-        
-        avg_latency = mean(latencies)
-        max_latency = max(latencies)
+            # offered rate for the round: its messages over its wall-clock span
+            round_rates.append(len(users) / (time.perf_counter() - start_round))
+            # the next round starts as soon as this one completes; gather already
+            # bounds it to one in-flight send per user
+        
+        # one sort serves max and every percentile; fsum avoids the exact
+        # fraction arithmetic statistics.mean does per sample
+        ordered = sorted(latencies)
+        avg_latency = fsum(ordered) / len(ordered)
+        max_latency = ordered[-1]
+        p50, p95, p99 = (percentile(ordered, pct) for pct in (50, 95, 99))
         
         result = TimingResult(
             operation="concurrent_message_latency",
             target_ms=500,
             actual_ms=avg_latency,
+            # p50/p95/p99 are reported for context; the gate stays on the worst send
             success=avg_latency < 1000 and max_latency < 2000
         )
         results.append(result)
         
-        print(f"   concurrent messages: avg={avg_latency:.1f}ms, max={max_latency:.1f}ms")
+        self.log(f"   concurrent messages: avg={avg_latency:.1f}ms, p50={p50:.1f}ms, "
+                 f"p95={p95:.1f}ms, p99={p99:.1f}ms, max={max_latency:.1f}ms")
+        self.log(f"   offered rate: {fsum(round_rates) / len(round_rates):.1f} msg/s per round ({len(users)} users)")
         
         return results
     
@@ -322,116 +455,138 @@ class DelayTester:
         username = f"{prefix}_{int(time.time()*1000)}"
         try:
             async with self.session.post(
-                f"{self.api_url}/register",
-                json={"username": username, "password": "test123", "initial_device_display_name": "delay_test"}
+                self._url_register,
+                data=dumps({"username": username, "password": "test123", "initial_device_display_name": "delay_test"}),
+                headers=JSON_HEADERS
             ) as resp:
                 if resp.status == 200:
-                    data = await resp.json()
+                    data = await resp.json(loads=loads)
                     return {
                         "token": data.get("access_token"),
                         "user_id": data.get("user_id")
                     }
-        except Exception as e:
-            print(f"   Error creating user: {e}")
+        except REQUEST_ERRORS as e:
+            self.note_error("create_user", e)
+            self.log(f"   Error creating user: {e}")
         return None
     
     async def create_server(self, token: str, name: str) -> str:
         try:
             async with self.session.post(
-                f"{self.api_url}/rooms/create",
-                json={"access_token": token, "name": name, "is_space": True}
+                self._url_create,
+                data=self.auth_body(token, {"name": name, "is_space": True}),
+                headers=JSON_HEADERS
             ) as resp:
                 if resp.status == 200:
-                    data = await resp.json()
+                    data = await resp.json(loads=loads)
                     return data.get("room_id")
-        except:
-            pass
+        except REQUEST_ERRORS as e:
+            self.note_error("create_server", e)
         return None
     
     async def create_channel(self, token: str, server_id: str, name: str, chan_type: str) -> str:
         try:
             async with self.session.post(
-                f"{self.api_url}/rooms/create",
-                json={"access_token": token, "name": name, "is_space": False, "parent_space_id": server_id, "channel_type": chan_type}
+                self._url_create,
+                data=self.auth_body(token, {"name": name, "is_space": False, "parent_space_id": server_id, "channel_type": chan_type}),
+                headers=JSON_HEADERS
             ) as resp:
                 if resp.status == 200:
-                    data = await resp.json()
+                    data = await resp.json(loads=loads)
                     return data.get("room_id")
-        except:
-            pass
+        except REQUEST_ERRORS as e:
+            self.note_error("create_channel", e)
         return None
     
     async def join_room(self, token: str, room_id: str):
         try:
             async with self.session.post(
-                f"{self.api_url}/rooms/join",
-                json={"access_token": token, "room_id_or_alias": room_id}
+                self._url_join,
+                data=self.auth_body(token, {"room_id_or_alias": room_id}),
+                headers=JSON_HEADERS
             ) as resp:
                 return resp.status == 200
-        except:
+        except REQUEST_ERRORS as e:
+            self.note_error("join_room", e)
             return False
     
     async def leave_room(self, token: str, room_id: str):
         try:
             async with self.session.post(
-                f"{self.api_url}/rooms/leave",
-                json={"access_token": token, "room_id": room_id}
+                self._url_leave,
+                data=self.auth_body(token, {"room_id": room_id}),
+                headers=JSON_HEADERS
             ) as resp:
                 return resp.status == 200
-        except:
+        except REQUEST_ERRORS as e:
+            self.note_error("leave_room", e)
             return False
     
     async def send_message(self, token: str, room_id: str, content: str) -> bool:
         try:
             async with self.session.post(
-                f"{self.api_url}/rooms/send",
-                json={"access_token": token, "room_id": room_id, "content": content}
+                self._url_send,
+                data=self.auth_body(token, {"room_id": room_id, "content": content}),
+                headers=JSON_HEADERS
             ) as resp:
                 return resp.status == 200
-        except:
+        except REQUEST_ERRORS as e:
+            self.note_error("send_message", e)
             return False
     
-    async def get_voice_participants(self, room_id: str) -> List[str]:
+    async def is_voice_participant(self, room_id: str, user_id: str) -> Optional[bool]:
+        key = ("voice", room_id, user_id)
+        return await self.single_flight(key, lambda: self._is_voice_participant(room_id, user_id))
+    
+    async def _is_voice_participant(self, room_id: str, user_id: str) -> Optional[bool]:
+        """membership check on the raw body, without decoding the participant list"""
+        # participants is a flat list of identity strings, so the quoted id
+        # can only match a whole entry; None when the lookup itself failed
+        needle = dumps(user_id)
         try:
             async with self.session.get(
-                f"{self.api_url}/voice/participants",
+                self._url_voice_participants,
                 params={"room_name": room_id}
             ) as resp:
                 if resp.status == 200:
-                    data = await resp.json()
-                    return data.get("participants", [])
-        except:
-            pass
-        return []
+                    return needle in await resp.read()
+        except REQUEST_ERRORS as e:
+            self.note_error("is_voice_participant", e)
+        return None
     
     async def sync(self, token: str, since: str = None):
+        return await self.single_flight(("sync", token, since), lambda: self._sync(token, since))
+    
+    async def _sync(self, token: str, since: str = None):
         try:
             params = {"access_token": token}
             if since:
                 params["since"] = since
-            async with self.session.get(f"{self.api_url}/sync", params=params) as resp:
+            async with self.session.get(self._url_sync, params=params) as resp:
                 if resp.status == 200:
-                    return await resp.json(), None
+                    return await resp.json(loads=loads), None
                 return None, await resp.text()
-        except Exception as e:
+        except REQUEST_ERRORS as e:
+            self.note_error("sync", e)
             return None, str(e)
     
-    async def get_joined_rooms(self, token: str) -> List[str]:
+    async def room_listed(self, token: str, room_id: str) -> Optional[bool]:
+        key = ("room_listed", token, room_id)
+        return await self.single_flight(key, lambda: self._room_listed(token, room_id))
+    
+    async def _room_listed(self, token: str, room_id: str) -> Optional[bool]:
+        """whether room_id is in the user's room list, stopping at the first match; None on error"""
         try:
             async with self.session.get(
-                f"{self.api_url}/rooms",
+                self._url_rooms,
                 params={"access_token": token}
             ) as resp:
                 if resp.status == 200:
-                    data = await resp.json()
-                    return [r.get("room_id") for r in data.get("rooms", [])]
-        except:
-            pass
-        return []
-    
-    async def create_dm_room(self, token: str, other_user: str) -> str:
-        # For simplicity, just create a regular room
-        return await self.create_server(token, f"DM_{other_user}")
+                    data = await resp.json(loads=loads)
+                    return any(r.get("room_id") == room_id for r in data.get("rooms", []))
+        except REQUEST_ERRORS as e:
+            self.note_error("room_listed", e)
+        return None
 
 
 async def main():
@@ -443,36 +598,59 @@ async def main():
     print(f"testing against: {api_url}")
     print("="*70)
     
-    async with aiohttp.ClientSession() as session:
+    # one long-lived pool for every phase so idle gaps between tests don't
+    # tear down sockets and add reconnects to the measured latencies
+    connector = aiohttp.TCPConnector(limit=128, limit_per_host=64, keepalive_timeout=120, ttl_dns_cache=300)
+    timeout = aiohttp.ClientTimeout(total=10, sock_connect=2)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
         tester = DelayTester(api_url, session)
         all_results = []
         
-        try:
-            all_results.extend(await tester.test_voice_disconnect_delay())
-            all_results.extend(await tester.test_message_sync_delay())
-            all_results.extend(await tester.test_server_list_refresh())
-            all_results.extend(await tester.test_channel_creation_delay())
-            all_results.extend(await tester.test_concurrent_load_delays())
-        except Exception as e:
-            print(f"\ntest error: {e}")
-            import traceback
-            traceback.print_exc()
+        # roughly the peak number of requests the concurrent phases have in flight;
+        # the 120s keep-alive holds these open for the rest of the run
+        await tester.warm_pool(16)
+        
+        if not await tester.setup_fixtures():
+            print("fixture setup failed, not running timing tests")
+            return 1
+        
+        # the propagation tests can overlap because each one acts through a
+        # different fixture user or on an object it creates itself (the
+        # channel test is the only one acting as the owner); the load test
+        # runs alone afterwards so it can't skew them
+        phases = await asyncio.gather(*[tester.run_phase(test) for test in (
+            tester.test_voice_disconnect_delay,
+            tester.test_message_sync_delay,
+            tester.test_server_list_refresh,
+            tester.test_channel_creation_delay,
+        )])
+        phases.append(await tester.run_phase(tester.test_concurrent_load_delays))
+        
+        for results, output in phases:
+            all_results.extend(results)
+            print("\n".join(output))
         
         # summary
         print("\n" + "="*70)
         print("timing test summary")
         print("="*70)
         
-        passed = sum(1 for r in all_results if r.success)
-        failed = len(all_results) - passed
-        
+        # one pass both prints each result and counts the passes
+        passed = 0
         for result in all_results:
+            passed += result.success
             status = "pass" if result.success else "fail"
             print(f"\n{status} {result.operation}")
             print(f"   target: <{result.target_ms}ms")
             print(f"   actual: {result.actual_ms:.1f}ms")
             if result.actual_ms > result.target_ms:
                 print(f"   exceeded by {result.actual_ms - result.target_ms:.1f}ms")
+        failed = len(all_results) - passed
+        
+        if tester.request_errors:
+            print("\nrequest errors:")
+            for error, count in tester.request_errors.most_common():
+                print(f"   {error} x{count}")
         
         print("\n" + "="*70)
         print(f"results: {passed} passed, {failed} failed")
@@ -486,5 +664,6 @@ async def main():
 
 
 if __name__ == '__main__':
-    exit_code = asyncio.run(main())
+    run = uvloop.run if uvloop and sys.platform != "win32" else asyncio.run
+    exit_code = run(main())
     sys.exit(exit_code)
@@ -14,7 +14,11 @@ async def smoke_test(api_url: str = "http://localhost:3000"):
     print("agora smoke test")
     print("="*50)
     
-    async with aiohttp.ClientSession() as session:
+    # the checks run one after another, so a small keep-alive pool is enough;
+    # the timeout keeps a hung api from stalling the run for aiohttp's default 5 minutes
+    connector = aiohttp.TCPConnector(limit=8, keepalive_timeout=60, ttl_dns_cache=300)
+    timeout = aiohttp.ClientTimeout(total=10, sock_connect=2)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
         tests_passed = 0
         tests_failed = 0
         
@@ -32,83 +36,94 @@ async def smoke_test(api_url: str = "http://localhost:3000"):
             print(f"   api connection failed: {e}")
             tests_failed += 1
         
+        async def post(path: str, payload: dict):
+            """post json, returning the status and the decoded body on success"""
+            async with session.post(f"{api_url}{path}", json=payload) as resp:
+                return resp.status, (await resp.json() if resp.status == 200 else None)
+        
+        # each step below only runs when the one it depends on produced an id
+        access_token = server_id = channel_id = None
+        
         # test 2: user registration
         print("\ntesting user registration...")
         username = f"smoke_test_{int(time.time())}"
         try:
-            async with session.post(
-                f"{api_url}/register",
-                json={"username": username, "password": "smoke123", "initial_device_display_name": "smoke"}
-            ) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    access_token = data.get("access_token")
-                    user_id = data.get("user_id")
-                    print(f"   registered user: {user_id}")
-                    tests_passed += 1
-                    
-                    # test 3: server creation
-                    print("\ntesting server creation...")
-                    async with session.post(
-                        f"{api_url}/rooms/create",
-                        json={"access_token": access_token, "name": "SmokeServer", "is_space": True}
-                    ) as resp2:
-                        if resp2.status == 200:
-                            server_data = await resp2.json()
-                            server_id = server_data.get("room_id")
-                            print(f"   created server: {server_id}")
-                            tests_passed += 1
-                            
-                            # test 4: channel creation
-                            print("\ntesting channel creation...")
-                            async with session.post(
-                                f"{api_url}/rooms/create",
-                                json={
-                                    "access_token": access_token, 
-                                    "name": "smoke-channel", 
-                                    "is_space": False,
-                                    "parent_space_id": server_id,
-                                    "channel_type": "text"
-                                }
-                            ) as resp3:
-                                if resp3.status == 200:
-                                    print("   created text channel")
-                                    tests_passed += 1
-                                    
-                                    # test 5: send message
-                                    print("\ntesting message sending...")
-                                    channel_data = await resp3.json()
-                                    channel_id = channel_data.get("room_id")
-                                    async with session.post(
-                                        f"{api_url}/rooms/send",
-                                        json={
-                                            "access_token": access_token,
-                                            "room_id": channel_id,
-                                            "content": "Smoke test message"
-                                        }
-                                    ) as resp4:
-                                        if resp4.status == 200:
-                                            print("   sent message")
-                                            tests_passed += 1
-                                        else:
-                                            print(f"   message failed: {resp4.status}")
-                                            tests_failed += 1
-                                else:
-                                    print(f"   channel creation failed: {resp3.status}")
-                                    tests_failed += 1
-                        else:
-                            print(f"   server creation failed: {resp2.status}")
-                            tests_failed += 1
-                else:
-                    print(f"   registration failed: {resp.status}")
-                    tests_failed += 1
+            status, data = await post("/register", {
+                "username": username, "password": "smoke123", "initial_device_display_name": "smoke"
+            })
+            if status == 200:
+                access_token = data.get("access_token")
+                print(f"   registered user: {data.get('user_id')}")
+                tests_passed += 1
+            else:
+                print(f"   registration failed: {status}")
+                tests_failed += 1
         except Exception as e:
             print(f"   registration error: {e}")
             tests_failed += 1
         
+        # test 3: server creation
+        if access_token:
+            print("\ntesting server creation...")
+            try:
+                status, data = await post("/rooms/create", {
+                    "access_token": access_token, "name": "SmokeServer", "is_space": True
+                })
+                if status == 200:
+                    server_id = data.get("room_id")
+                    print(f"   created server: {server_id}")
+                    tests_passed += 1
+                else:
+                    print(f"   server creation failed: {status}")
+                    tests_failed += 1
+            except Exception as e:
+                print(f"   server creation error: {e}")
+                tests_failed += 1
+        
+        # test 4: channel creation
+        if server_id:
+            print("\ntesting channel creation...")
+            try:
+                status, data = await post("/rooms/create", {
+                    "access_token": access_token,
+                    "name": "smoke-channel",
+                    "is_space": False,
+                    "parent_space_id": server_id,
+                    "channel_type": "text"
+                })
+                if status == 200:
+                    channel_id = data.get("room_id")
+                    print("   created text channel")
+                    tests_passed += 1
+                else:
+                    print(f"   channel creation failed: {status}")
+                    tests_failed += 1
+            except Exception as e:
+                print(f"   channel creation error: {e}")
+                tests_failed += 1
+        
+        # test 5: send message
+        if channel_id:
+            print("\ntesting message sending...")
+            try:
+                status, _ = await post("/rooms/send", {
+                    "access_token": access_token,
+                    "room_id": channel_id,
+                    "content": "Smoke test message"
+                })
+                if status == 200:
+                    print("   sent message")
+                    tests_passed += 1
+                else:
+                    print(f"   message failed: {status}")
+                    tests_failed += 1
+            except Exception as e:
+                print(f"   message error: {e}")
+                tests_failed += 1
+        
         # test 6: sync
         print("\ntesting sync endpoint...")
-        if 'access_token' in dir() or 'access_token' in locals():
+        if access_token:
             try:
                 async with session.get(
                     f"{api_url}/sync",
@@ -9,11 +9,19 @@ import os
 import sys
 import subprocess
 import argparse
+import mmap
+import queue
 import tempfile
+import threading
 import time
 import signal
+import traceback
+import urllib.error
+import urllib.request
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Deque, Iterable, List, Tuple, Optional
 
 # configuration defaults
 default_api_url = "http://localhost:3000"
@@ -23,57 +31,147 @@ default_homeserver = "http://localhost:8448"
 script_dir = Path(__file__).parent.resolve()
 load_tests_dir = script_dir / "load-tests"
 
+# test scripts, as the strings subprocess gets
+smoke_script = str(load_tests_dir / "smoke_test.py")
+suite_script = str(load_tests_dir / "agora_test_suite.py")
+chaos_script = str(load_tests_dir / "chaos_test.py")
+delay_script = str(load_tests_dir / "delay_test.py")
 
-def check_services(api_url: str, homeserver: str) -> bool:
-    """check if services are running"""
+# when set (the default when stdout isn't a terminal, e.g. ci), phase output is
+# captured into a bounded ring and only its tail is echoed: the summary block on
+# success, the last ring_lines lines on failure
+capture_output = False
+ring_lines = 500
+
+# the title line each script prints above its final summary; a passing phase
+# is echoed from the separator line just above it
+smoke_summary = b"results: "
+suite_summary = b"test results summary"
+chaos_summary = b"chaos test summary"
+delay_summary = b"timing test summary"
+
+
+def probe(url: str, cutoff: float, timeout: float = 1.5, retries: int = 2, backoff: float = 0.5) -> Tuple[Optional[int], Optional[Exception]]:
+    """
+    GET a url, retrying connection errors and 5xx responses with a linear backoff.
+    every attempt and pause is clipped to `cutoff` (a time.monotonic() value).
+    returns the final http status, or None and the last error if nothing answered
+    """
+    error: Exception = TimeoutError("no answer before the deadline")
+    for attempt in range(retries + 1):
+        if attempt:
+            pause = backoff * attempt
+            if time.monotonic() + pause >= cutoff:
+                break
+            time.sleep(pause)
+        remaining = cutoff - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            with urllib.request.urlopen(url, timeout=min(timeout, remaining)) as response:
+                return response.status, None
+        except urllib.error.HTTPError as e:
+            if e.code < 500 or attempt == retries:
+                return e.code, None
+        except Exception as e:
+            error = e
+    return None, error
+
+
+def check_services(api_url: str, homeserver: str, deadline: float = 5.0) -> bool:
+    """check if services are running; probes run concurrently under one overall deadline"""
     print("checking if services are running...")
     
-    # check api
-    try:
-        import urllib.request
-        req = urllib.request.Request(f"{api_url}/health", method="GET")
-        with urllib.request.urlopen(req, timeout=5) as response:
-            if response.status == 200:
-                print("   api is responding")
-            else:
-                print(f"   api returned status {response.status}")
-                return False
-    except Exception as e:
-        print(f"   api is not responding at {api_url}")
-        print(f"      error: {e}")
-        print("      start it with: cargo run --manifest-path backend/api/Cargo.toml")
-        return False
+    # name, probe url, base url, how to start it
+    checks = [
+        ("api", f"{api_url}/health", api_url, "cargo run --manifest-path backend/api/Cargo.toml"),
+        ("conduit", f"{homeserver}/_matrix/client/versions", homeserver, "docker-compose up conduit"),
+    ]
     
-    # check conduit
-    try:
-        import urllib.request
-        req = urllib.request.Request(f"{homeserver}/_matrix/client/versions", method="GET")
-        with urllib.request.urlopen(req, timeout=5) as response:
-            if response.status == 200:
-                print("   conduit is responding")
-            else:
-                print(f"   conduit returned status {response.status}")
-                return False
-    except Exception as e:
-        print(f"   conduit is not responding at {homeserver}")
-        print(f"      error: {e}")
-        print("      start it with: docker-compose up conduit")
-        return False
+    cutoff = time.monotonic() + deadline
+    results: queue.Queue = queue.Queue()
+    for check in checks:
+        # daemon threads, so a probe stuck in a slow read can't hold up exit
+        # once the deadline has passed
+        threading.Thread(
+            target=lambda check=check: results.put((check, probe(check[1], cutoff))),
+            daemon=True
+        ).start()
+    
+    pending = list(checks)
+    while pending:
+        try:
+            check, (status, error) = results.get(timeout=max(0.0, cutoff - time.monotonic()))
+        except queue.Empty:
+            for name, _, base_url, start_hint in pending:
+                print(f"   {name} is not responding at {base_url}")
+                print(f"      error: no answer within {deadline:.0f}s")
+                print(f"      start it with: {start_hint}")
+            return False
+        pending.remove(check)
+        name, _, base_url, start_hint = check
+        if status == 200:
+            print(f"   {name} is responding")
+            continue
+        if status is not None:
+            print(f"   {name} returned status {status}")
+        else:
+            print(f"   {name} is not responding at {base_url}")
+            print(f"      error: {error}")
+            print(f"      start it with: {start_hint}")
+        return False  # no need to wait for the other probe
     
     print("")
     return True
 
 
+def tail_lines(path: Path, lines: int, small_file: int = 64 * 1024) -> Tuple[List[bytes], bool]:
+    """
+    read the last `lines` lines of a file. larger files are memory-mapped and
+    scanned back from the end, so only the tail is ever copied out.
+    returns the lines and whether older output was left out
+    """
+    with open(path, 'rb') as f:
+        size = f.seek(0, os.SEEK_END)
+        if size < small_file:
+            f.seek(0)
+            tail = f.read().splitlines()
+            return tail[-lines:], len(tail) > lines
+        
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # a trailing newline ends the last line rather than starting a new one
+            pos = size - 1 if mm[size - 1] == ord("\n") else size
+            for _ in range(lines):
+                pos = mm.rfind(b"\n", 0, pos)
+                if pos < 0:
+                    break
+            return mm[pos + 1:].splitlines(), pos >= 0
+
+
 class DockerLogMonitor:
-    """monitor docker logs in real-time"""
+    """
+    monitor docker logs in real-time, or with follow=False fetch one bounded
+    window per service after the run instead of streaming throughout it
+    """
     
-    def __init__(self, services: List[str]):
+    def __init__(self, services: List[str], follow: bool = True):
         self.services = services
+        self.follow = follow
         self.processes: List[subprocess.Popen] = []
         self.log_dir = None
+        self.start_ts: Optional[float] = None
+    
+    @staticmethod
+    def container_name(service: str) -> str:
+        return f"agora_{service}" if not service.startswith("agora_") else service
         
     def start(self):
         """start monitoring logs"""
+        self.start_ts = time.time()
+        if not self.follow:
+            print(f"   collecting docker logs after the run for: {', '.join(self.services)}")
+            return
+        
         # create temp directory for log files
         self.log_dir = Path(tempfile.mkdtemp())
         print(f"   log files: {self.log_dir}")
@@ -81,28 +179,23 @@ class DockerLogMonitor:
         # start log collection for each service
         for service in self.services:
             log_file = self.log_dir / f"{service}.log"
-            container_name = f"agora_{service}" if not service.startswith("agora_") else service
+            container_name = self.container_name(service)
             
             try:
-                # use powershell on windows, bash on linux
-                if sys.platform == "win32":
-                    # windows: use docker logs with file redirection
-                    cmd = f'docker logs -f --tail=50 {container_name} > "{log_file}" 2>&1'
+                # the child writes straight into the log file on both platforms;
+                # on windows it gets its own process group so ctrl-c in the
+                # runner doesn't reach it before stop() does
+                flags = subprocess.CREATE_NEW_PROCESS_GROUP if sys.platform == "win32" else 0
+                # append mode so writes always land at the end even if another
+                # writer shares the file; the parent's handle is only lent to
+                # the child (python fds are non-inheritable), so buffering it is moot
+                with open(log_file, 'ab') as f:
                     proc = subprocess.Popen(
-                        cmd,
-                        shell=True,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE,
-                        creationflags=subprocess.CREATE_NEW_PROCESS_GROUP
+                        ["docker", "logs", "-f", "--tail=50", container_name],
+                        stdout=f,
+                        stderr=subprocess.STDOUT,
+                        creationflags=flags
                     )
-                else:
-                    # linux/mac
-                    with open(log_file, 'w') as f:
-                        proc = subprocess.Popen(
-                            ["docker", "logs", "-f", "--tail=50", container_name],
-                            stdout=f,
-                            stderr=subprocess.STDOUT
-                        )
                 
                 self.processes.append(proc)
             except Exception as e:
@@ -110,66 +203,153 @@ class DockerLogMonitor:
         
         print(f"   started monitoring docker logs for: {', '.join(self.services)}")
     
-    def stop(self):
-        """stop monitoring"""
+    def stop(self, timeout: float = 2.0):
+        """stop monitoring; every follower is signalled first, then they share one deadline"""
         for proc in self.processes:
             try:
                 if sys.platform == "win32":
-                    proc.terminate()
+                    # reaches the follower's own process group and lets it exit
+                    # cleanly; terminate() there is an immediate hard kill
+                    proc.send_signal(signal.CTRL_BREAK_EVENT)
                 else:
                     proc.terminate()
-                    proc.wait(timeout=2)
-            except:
-                pass
+            except OSError:
+                pass  # already exited
+        
+        deadline = time.monotonic() + timeout
+        for proc in self.processes:
+            try:
+                proc.wait(timeout=max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+    
+    def recent_logs(self, service: str, lines: int) -> Tuple[List[bytes], bool]:
+        """the last lines for one service and whether older output was left out"""
+        if self.follow:
+            return tail_lines(self.log_dir / f"{service}.log", lines)
+        result = subprocess.run(
+            ["docker", "logs", "--since", str(int(self.start_ts)), f"--tail={lines}", self.container_name(service)],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            timeout=10
+        )
+        return result.stdout.splitlines(), False
     
     def print_recent_logs(self, lines: int = 50):
-        """print recent logs from files"""
+        """print recent logs, from the followed files or one docker logs call per service"""
         print(f"\nrecent docker logs (last {lines} lines per service):")
         print("-" * 70)
         
-        if not self.log_dir:
+        if self.start_ts is None:
             return
-            
-        for service in self.services:
-            log_file = self.log_dir / f"{service}.log"
-            if log_file.exists():
+        services = [s for s in self.services
+                    if not self.follow or (self.log_dir / f"{s}.log").exists()]
+        
+        # the windowed fetches each spawn docker, so run them side by side
+        with ThreadPoolExecutor(max_workers=max(1, min(8, len(services)))) as pool:
+            futures = [pool.submit(self.recent_logs, service, lines) for service in services]
+        
+        for service, future in zip(services, futures):
+            try:
+                tail, truncated = future.result()
+            except (OSError, subprocess.SubprocessError) as e:
                 print(f"\n{service}:")
-                try:
-                    with open(log_file, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.readlines()
-                        # show last n lines
-                        for line in content[-lines:]:
-                            line = line.strip()
-                            if line:
-                                print(f"   {line}")
-                except Exception as e:
-                    print(f"   error reading log: {e}")
-
-
-def run_smoke_test(api_url: str):
+                print(f"   error reading log: {e}")
+                continue
+            print(f"\n{service}:" + (" (older lines omitted)" if truncated else ""))
+            # one write per service rather than a print per line
+            decoded = (raw.decode('utf-8', errors='ignore').strip() for raw in tail)
+            text = "".join(f"   {line}\n" for line in decoded if line)
+            sys.stdout.write(text)
+
+
+def read_tail(lines: Iterable[bytes]) -> Tuple[Deque[bytes], int]:
+    """consume output lines, keeping the last ring_lines; returns them and the total count"""
+    ring: Deque[bytes] = deque(maxlen=ring_lines)
+    total = 0
+    for total, line in enumerate(lines, 1):
+        ring.append(line)
+    return ring, total
+
+
+def summary_start(lines: List[bytes], marker: bytes) -> int:
+    """index of the separator above the last summary marker line, or 0 if it isn't there"""
+    for i in range(len(lines) - 1, -1, -1):
+        if lines[i].startswith(marker):
+            return i - 1 if i and lines[i - 1].startswith(b"=") else i
+    return 0
+
+
+def echo_tail(ring: Deque[bytes], total: int, ok: bool, summary_marker: bytes):
+    """write the captured tail of a phase's output"""
+    shown = list(ring)
+    if ok:
+        shown = shown[summary_start(shown, summary_marker):]
+    if total > len(shown):
+        print(f"   ... {total - len(shown)} earlier lines omitted (use --verbose for full output)")
+    sys.stdout.write(b"".join(shown).decode('utf-8', errors='replace'))
+    sys.stdout.flush()
+
+
+def run_script(title: str, args: List[str], summary_marker: bytes, out=None) -> bool:
+    """
+    run one test script. output goes to the terminal (or through the capture
+    ring, trimmed to the block starting at summary_marker on success), or to
+    `out` (a binary file) when the phase runs alongside another one and must
+    not interleave
+    """
+    header = f"\nrunning {title}...\n{'-' * 50}\n"
+    if out is None:
+        print(header, end="", flush=True)  # ahead of the child's own output
+        if not capture_output:
+            return subprocess.run(args).returncode == 0
+        proc = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        with proc.stdout:
+            tail = read_tail(proc.stdout)
+        ok = proc.wait() == 0
+        echo_tail(*tail, ok, summary_marker)
+        return ok
+    out.write(header.encode())
+    out.flush()
+    return subprocess.run(args, stdout=out, stderr=subprocess.STDOUT).returncode == 0
+
+
+def run_side_by_side(phases) -> bool:
+    """
+    run phases, (summary marker, callable taking an output file) pairs,
+    concurrently, printing each one's output in order once they have all finished
+    """
+    outputs = [tempfile.TemporaryFile() for _ in phases]
+    try:
+        with ThreadPoolExecutor(max_workers=len(phases)) as pool:
+            results = list(pool.map(lambda phase, out: phase[1](out), phases, outputs))
+        for (summary_marker, _), out, ok in zip(phases, outputs, results):
+            out.seek(0)
+            if capture_output:
+                # keep the three header lines run_script wrote out of the trim
+                sys.stdout.write(b"".join(out.readline() for _ in range(3)).decode())
+                echo_tail(*read_tail(out), ok, summary_marker)
+            else:
+                sys.stdout.write(out.read().decode('utf-8', errors='replace'))
+        sys.stdout.flush()
+    finally:
+        for out in outputs:
+            out.close()
+    return all(results)
+
+
+def run_smoke_test(api_url: str, out=None):
     """run smoke tests"""
-    print("")
-    print("running smoke tests...")
-    print("-" * 50)
-    
-    script = load_tests_dir / "smoke_test.py"
-    result = subprocess.run(
-        [sys.executable, str(script), api_url],
-        capture_output=False
-    )
-    return result.returncode == 0
+    return run_script("smoke tests", [sys.executable, smoke_script, api_url], smoke_summary, out)
 
 
 def run_load_test(api_url: str, homeserver: str, config: dict):
     """run load tests"""
-    print("")
-    print("running load tests...")
-    print("-" * 50)
-    
     # build arguments
     args = [
         sys.executable,
-        str(load_tests_dir / "agora_test_suite.py"),
+        suite_script,
         "--api-url", api_url,
         "--homeserver", homeserver
     ]
@@ -185,36 +365,17 @@ def run_load_test(api_url: str, homeserver: str, config: dict):
     
     args.append("--monitor-docker")
     
-    result = subprocess.run(args)
-    return result.returncode == 0
+    return run_script("load tests", args, suite_summary)
 
 
 def run_chaos_test(api_url: str):
     """run chaos tests"""
-    print("")
-    print("running chaos tests...")
-    print("-" * 50)
-    
-    script = load_tests_dir / "chaos_test.py"
-    result = subprocess.run(
-        [sys.executable, str(script), api_url],
-        capture_output=False
-    )
-    return result.returncode == 0
+    return run_script("chaos tests", [sys.executable, chaos_script, api_url], chaos_summary)
 
 
-def run_delay_test(api_url: str):
+def run_delay_test(api_url: str, out=None):
     """run delay/timing tests"""
-    print("")
-    print("running delay/timing tests...")
-    print("-" * 50)
-    
-    script = load_tests_dir / "delay_test.py"
-    result = subprocess.run(
-        [sys.executable, str(script), api_url],
-        capture_output=False
-    )
-    return result.returncode == 0
+    return run_script("delay/timing tests", [sys.executable, delay_script, api_url], delay_summary, out)
 
 
 def main():
@@ -226,9 +387,16 @@ def main():
                        help='agora api url')
     parser.add_argument('--homeserver', default=os.environ.get('HOMESERVER', default_homeserver),
                        help='matrix homeserver url')
+    parser.add_argument('--sequential', action='store_true',
+                       help="with 'all', run smoke and delay one after the other instead of side by side")
+    parser.add_argument('--verbose', action='store_true',
+                       help='always show full test output (by default it is trimmed when stdout is not a terminal)')
     
     args = parser.parse_args()
     
+    global capture_output
+    capture_output = not args.verbose and not sys.stdout.isatty()
+    
     print("agora test suite")
     print("=" * 50)
     print(f"api url: {args.api_url}")
@@ -261,8 +429,16 @@ def main():
         elif args.command == 'delay':
             success = run_delay_test(args.api_url)
         elif args.command == 'all':
-            success = (run_smoke_test(args.api_url) and
-                      run_delay_test(args.api_url) and
+            if args.sequential:
+                quick = run_smoke_test(args.api_url) and run_delay_test(args.api_url)
+            else:
+                # smoke and delay only touch their own users and rooms, so they can
+                # share the api; load and chaos stress it and still run alone
+                quick = run_side_by_side([
+                    (smoke_summary, lambda out: run_smoke_test(args.api_url, out)),
+                    (delay_summary, lambda out: run_delay_test(args.api_url, out)),
+                ])
+            success = (quick and
                       run_load_test(args.api_url, args.homeserver, config) and
                       run_chaos_test(args.api_url))
     except KeyboardInterrupt:
@@ -270,7 +446,6 @@ def main():
         success = False
     except Exception as e:
         print(f"\ntest failed with error: {e}")
-        import traceback
         traceback.print_exc()
         success = False
     